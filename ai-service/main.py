@@ -5,8 +5,13 @@ import os
 from dotenv import load_dotenv
 
 from routers import forecasts, admin, reports
-from utils.database import connect_db, close_db
+from utils.database import connect_db, close_db, ensure_indexes
 from utils.redis_client import get_redis_client, close_redis
+from utils.worker_pool import close_process_pool
+from services.demand_counters import demand_counters
+from services.spike_detector import spike_detector
+from utils.admission import AdmissionControlMiddleware
+from utils.profiling import ProfilingMiddleware
 
 load_dotenv()
 
@@ -14,11 +19,23 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     # Startup
     await connect_db()
+    # Off by default so a rolling deploy doesn't issue createIndexes from every
+    # replica at once; run `python -m utils.database --ensure-indexes` instead
+    if os.getenv("MONGODB_ENSURE_INDEXES", "false").lower() == "true":
+        try:
+            await ensure_indexes()
+        except Exception as e:
+            print(f"Error ensuring indexes: {e}")
     await get_redis_client()
+    demand_counters.start()
+    spike_detector.start()
     yield
     # Shutdown
+    await spike_detector.stop()
+    await demand_counters.stop()
     await close_db()
     await close_redis()
+    close_process_pool()
 
 app = FastAPI(
     title="AgroMarketHub AI Service",
@@ -27,6 +44,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Middleware added last runs first: CORS wraps admission control so its 503s
+# still carry the CORS headers browsers need to see a retryable response
+
+# Admin-gated request profiling (X-Profile header / __profile query flag)
+app.add_middleware(ProfilingMiddleware)
+
+# Per-route-class concurrency limits; over-capacity requests get 503 + Retry-After
+app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +60,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 # Health check
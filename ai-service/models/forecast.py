@@ -19,3 +19,8 @@ class ForecastOverride(BaseModel):
     forecasts: List[ForecastData]
     changes: List[Dict]
 
+
+class ReportBatchRequest(BaseModel):
+    farmer_ids: Optional[List[str]] = None
+    formats: List[str] = ["pdf"]
+    forecast_type: str = "monthly"
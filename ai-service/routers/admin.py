@@ -1,8 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Optional
-from utils.database import get_database
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse
+from typing import Dict, List, Optional
+from utils.database import get_database, get_query_stats
+from utils.response_cache import invalidate
 from datetime import datetime
 from models.forecast import ForecastOverride
+from services import backtesting, model_store
+from services.forecast_service import invalidate_forecast_paths
+from services.model_manager import model_manager
+from utils.admission import get_admission_stats
+from utils.auth import require_admin
+from utils.profiling import get_profile, list_profiles
+from utils.stage_timer import stage_stats
+from utils.worker_pool import get_process_pool_stats, recycle_process_pool
 
 router = APIRouter()
 
@@ -64,6 +74,8 @@ async def get_audit_logs(
             .sort("createdAt", -1)\
             .limit(limit)\
             .to_list(length=limit)
+        for log in logs:
+            log["_id"] = str(log["_id"])
         
         return {
             "success": True,
@@ -72,3 +84,136 @@ async def get_audit_logs(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.delete("/forecast-cache")
+async def clear_forecast_cache():
+    """Drop pre-serialized forecast responses and shared forecast paths so the next request recomputes them"""
+    try:
+        await invalidate("forecast:")
+        await invalidate_forecast_paths()
+        return {
+            "success": True,
+            "message": "Forecast cache cleared"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/backtest", dependencies=[Depends(require_admin)], status_code=202)
+async def run_backtest(
+    forecast_types: Optional[List[str]] = Query(None),
+    folds: int = Query(backtesting.BACKTEST_FOLDS, ge=1, le=12),
+    accuracy_target: float = Query(backtesting.BACKTEST_ACCURACY_TARGET, gt=0)
+):
+    """Start a backtest of every forecasting engine; the report and routing are stored when it finishes"""
+    try:
+        status = await backtesting.start_backtest(
+            forecast_types=forecast_types,
+            folds=folds,
+            accuracy_target=accuracy_target
+        )
+        return {
+            "success": True,
+            "data": status
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/backtest/status", dependencies=[Depends(require_admin)])
+async def get_backtest_status():
+    """Get the state of the latest started backtest"""
+    status = await backtesting.load_status()
+    if status is None:
+        raise HTTPException(status_code=404, detail="No backtest has been started")
+    return {
+        "success": True,
+        "data": status
+    }
+
+@router.get("/backtest")
+async def get_backtest_report():
+    """Get the latest backtest report"""
+    report = await backtesting.load_report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No backtest report available")
+    return {
+        "success": True,
+        "data": report
+    }
+
+@router.get("/admission")
+async def get_admission():
+    """Get per-route-class concurrency, queue depth and shed counts"""
+    return {
+        "success": True,
+        "data": get_admission_stats()
+    }
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+async def get_profiles():
+    """List retained request profiles, newest first"""
+    return {
+        "success": True,
+        "data": list_profiles()
+    }
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile_tree(profile_id: str):
+    """Get a retained profile's call tree"""
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {
+        "success": True,
+        "data": {key: value for key, value in profile.items() if key != "folded"}
+    }
+
+@router.get("/profiles/{profile_id}/folded", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str):
+    """Get a retained profile as collapsed stacks for flamegraph.pl / speedscope"""
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile["folded"]
+
+@router.get("/slow-queries")
+async def get_slow_queries():
+    """Get Mongo queries over the slow-query threshold, grouped by pipeline shape"""
+    return {
+        "success": True,
+        "data": get_query_stats()
+    }
+
+@router.get("/pipeline")
+async def get_pipeline_stats():
+    """Get per-stage forecast pipeline timings (weather, sales, series, model fits, build)"""
+    return {
+        "success": True,
+        "data": stage_stats.snapshot()
+    }
+
+@router.get("/models")
+async def get_model_stats():
+    """Get resident models, their estimated memory use and the memory budget.
+
+    Demand models are fitted and cached in the pool workers; `workers` lists
+    each worker's cache as reported after its last job.
+    """
+    return {
+        "success": True,
+        "data": {
+            **model_manager.stats(),
+            "workers": get_process_pool_stats(),
+            # Last bounded LSTM fit per model key, including fits done in pool workers
+            "training": model_store.load_prefix("training:")
+        }
+    }
+
+@router.delete("/models")
+async def clear_models():
+    """Release every resident model, replacing pool workers to free their caches"""
+    model_manager.clear()
+    recycle_process_pool()
+    return {
+        "success": True,
+        "message": "Resident models released"
+    }
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional, Dict
 from services.forecast_service import ForecastService
+from services.spike_detector import spike_detector
 from utils.database import get_database
-from datetime import datetime
+from utils.response_cache import cached_json_response, RESPONSE_CACHE_TTL, REALTIME_CACHE_TTL
+from datetime import datetime, timedelta
 from models.forecast import ForecastResponse
 
 router = APIRouter()
@@ -10,13 +12,16 @@ forecast_service = ForecastService()
 
 @router.get("/nationwide", response_model=ForecastResponse)
 async def get_nationwide_forecast(
-    forecast_type: str = Query("monthly", regex="^(daily|weekly|monthly|seasonal)$")
+    request: Request,
+    forecast_type: str = Query("monthly", regex="^(daily|weekly|monthly|seasonal)$"),
+    mode: Optional[str] = Query(None, regex="^(aggregate|per_crop)$")
 ):
     """Get nationwide demand forecast"""
-    try:
+    async def build():
         forecasts = await forecast_service.generate_demand_forecast(
             forecast_type=forecast_type,
-            scope="nationwide"
+            scope="nationwide",
+            mode=mode
         )
         
         return {
@@ -28,25 +33,32 @@ async def get_nationwide_forecast(
                 "forecasts": forecasts
             }
         }
+
+    try:
+        ttl = REALTIME_CACHE_TTL if forecast_type == "daily" else RESPONSE_CACHE_TTL
+        return await cached_json_response(request, f"forecast:nationwide:{forecast_type}:{mode or ''}", build, ttl)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/regional", response_model=Dict)
 async def get_regional_forecast(
+    request: Request,
     county: Optional[str] = None,
-    subCounty: Optional[str] = None
+    subCounty: Optional[str] = None,
+    mode: Optional[str] = Query(None, regex="^(aggregate|per_crop)$")
 ):
     """Get regional demand forecast"""
-    try:
-        region = {}
-        if county:
-            region["county"] = county
-        if subCounty:
-            region["subCounty"] = subCounty
-        
+    region = {}
+    if county:
+        region["county"] = county
+    if subCounty:
+        region["subCounty"] = subCounty
+
+    async def build():
         forecasts = await forecast_service.generate_demand_forecast(
             scope="county" if county else "nationwide",
-            region=region if region else None
+            region=region if region else None,
+            mode=mode
         )
         
         return {
@@ -57,6 +69,9 @@ async def get_regional_forecast(
                 "forecasts": forecasts
             }
         }
+
+    try:
+        return await cached_json_response(request, f"forecast:regional:{county or ''}:{subCounty or ''}:{mode or ''}", build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -115,3 +130,48 @@ async def get_yield_vs_demand_analysis(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/spikes")
+async def get_demand_spikes(
+    since: Optional[datetime] = None,
+    forecast_type: Optional[str] = Query(None, regex="^(daily|weekly|monthly|seasonal)$"),
+    crop: Optional[str] = None,
+    region: Optional[str] = None,
+    reason: Optional[str] = Query(None, regex="^(threshold|relative_change)$")
+):
+    """Get demand spikes detected since a point in time (defaults to the last 24 hours)"""
+    try:
+        since = since or datetime.utcnow() - timedelta(days=1)
+        # Naive datetimes are treated as UTC, like the stored detection times
+        since_ts = since.timestamp() if since.tzinfo else (since - datetime(1970, 1, 1)).total_seconds()
+        spikes = await spike_detector.spikes_since(
+            since_ts,
+            forecast_type=forecast_type,
+            crop=crop,
+            region=region,
+            reason=reason
+        )
+        return {
+            "success": True,
+            "data": {
+                "since": since,
+                "spikes": spikes
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/spikes/active")
+async def get_active_spikes(
+    forecast_type: Optional[str] = Query(None, regex="^(daily|weekly|monthly|seasonal)$"),
+    region: Optional[str] = None,
+    max_age: Optional[float] = Query(None, gt=0)
+):
+    """Get crops and regions currently above the spike threshold (observed within max_age seconds)"""
+    try:
+        return {
+            "success": True,
+            "data": await spike_detector.active_spikes(forecast_type, region=region, max_age=max_age)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,19 @@
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional
+import asyncio
 import io
-import csv
+import os
+import tempfile
 from datetime import datetime
+from models.forecast import ReportBatchRequest
 from services.forecast_service import ForecastService
+from services.data_export import data_exporter, write_table, ExportError, EXPORT_FORMATS, DATASETS
+from services.report_batch import report_batch, render_farmer_report
+from services.report_renderer import render_forecast_csv, render_forecast_pdf
+from services.data_collector import COUNTY_COORDINATES
 from utils.database import get_database
 
 router = APIRouter()
@@ -31,40 +40,13 @@ async def download_forecast_csv(
             region=region if region else None
         )
         
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Crop/Product',
-            'Demand Score',
-            'Price Recommendation (KES)',
-            'Confidence (%)',
-            'Region',
-            'Forecast Date',
-            'Forecast Type'
-        ])
-        
-        # Write data
-        for forecast in forecasts:
-            writer.writerow([
-                forecast.get('crop', forecast.get('product', 'N/A')),
-                forecast.get('demand', 0),
-                forecast.get('priceRecommendation', forecast.get('price_recommendation', 0)),
-                forecast.get('confidence', 0),
-                region.get('county', 'Nationwide') if region else 'Nationwide',
-                datetime.now().strftime('%Y-%m-%d'),
-                forecast_type
-            ])
-        
-        output.seek(0)
-        
+        content = render_forecast_csv(forecasts, forecast_type, region)
+
         # Generate filename
         filename = f"forecast_{scope}_{forecast_type}_{datetime.now().strftime('%Y%m%d')}.csv"
         
         return StreamingResponse(
-            iter([output.getvalue()]),
+            iter([content]),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -80,13 +62,6 @@ async def download_forecast_pdf(
 ):
     """Download forecast data as PDF"""
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib import colors
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
-        
         region = {}
         if county:
             region["county"] = county
@@ -99,87 +74,13 @@ async def download_forecast_pdf(
             region=region if region else None
         )
         
-        # Create PDF in memory
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1f2937'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        # Title
-        title = Paragraph("AgroMarketHub Demand Forecast Report", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Report metadata
-        metadata = [
-            ['Report Date:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-            ['Forecast Type:', forecast_type.capitalize()],
-            ['Scope:', scope.capitalize()],
-            ['Region:', region.get('county', 'Nationwide') if region else 'Nationwide'],
-        ]
-        
-        metadata_table = Table(metadata, colWidths=[2*inch, 4*inch])
-        metadata_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(metadata_table)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Forecast data table
-        if forecasts:
-            data = [['Crop/Product', 'Demand Score', 'Price (KES)', 'Confidence (%)']]
-            
-            for forecast in forecasts:
-                data.append([
-                    forecast.get('crop', forecast.get('product', 'N/A')),
-                    f"{forecast.get('demand', 0)}%",
-                    f"{forecast.get('priceRecommendation', forecast.get('price_recommendation', 0)):,.2f}",
-                    f"{forecast.get('confidence', 0)}%"
-                ])
-            
-            table = Table(data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f3f4f6')])
-            ]))
-            elements.append(table)
-        else:
-            no_data = Paragraph("No forecast data available", styles['Normal'])
-            elements.append(no_data)
-        
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-        
+        content = await run_in_threadpool(render_forecast_pdf, forecasts, forecast_type, scope, region)
+
         # Generate filename
         filename = f"forecast_{scope}_{forecast_type}_{datetime.now().strftime('%Y%m%d')}.pdf"
         
         return StreamingResponse(
-            io.BytesIO(buffer.read()),
+            io.BytesIO(content),
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -191,6 +92,131 @@ async def download_forecast_pdf(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+XLSX_HEADER = [
+    'Crop/Product',
+    'Demand Score',
+    'Price Recommendation (KES)',
+    'Confidence (%)',
+    'Region',
+    'Forecast Date',
+    'Forecast Type'
+]
+
+@router.get("/download/xlsx")
+async def download_forecast_xlsx(
+    sheets: str = Query("forecast_type", regex="^(forecast_type|county)$"),
+    forecast_type: List[str] = Query(["weekly", "monthly", "seasonal"]),
+    county: List[str] = Query([])
+):
+    """Download forecasts as an Excel workbook with one sheet per forecast type or county"""
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="Excel export requires openpyxl. Install with: pip install openpyxl"
+        )
+
+    for value in forecast_type:
+        if value not in ("daily", "weekly", "monthly", "seasonal"):
+            raise HTTPException(status_code=422, detail=f"Invalid forecast_type: {value}")
+
+    if sheets == "county":
+        counties = county or list(COUNTY_COORDINATES.keys())
+        county_forecast_type = "monthly" if "monthly" in forecast_type else forecast_type[0]
+        sheet_specs = [(name, county_forecast_type, {"county": name}) for name in counties]
+    else:
+        region = {"county": county[0]} if county else None
+        sheet_specs = [(name.capitalize(), name, region) for name in forecast_type]
+
+    # Write-only workbooks stream rows to disk as they are appended, so memory
+    # stays flat regardless of how many sheets/rows the export has
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook = Workbook(write_only=True)
+        report_date = datetime.now().strftime('%Y-%m-%d')
+        for title, sheet_forecast_type, region in sheet_specs:
+            forecasts = await forecast_service.generate_demand_forecast(
+                forecast_type=sheet_forecast_type,
+                scope="county" if region else "nationwide",
+                region=region
+            )
+            sheet = workbook.create_sheet(title=title[:31])
+            header = []
+            for label in XLSX_HEADER:
+                cell = WriteOnlyCell(sheet, value=label)
+                cell.font = Font(bold=True)
+                header.append(cell)
+            sheet.append(header)
+            for forecast in forecasts:
+                sheet.append([
+                    forecast.get('crop', forecast.get('product', 'N/A')),
+                    float(forecast.get('demand', 0)),
+                    float(forecast.get('priceRecommendation', forecast.get('price_recommendation', 0)) or 0),
+                    float(forecast.get('confidence', 0)),
+                    region.get('county', 'Nationwide') if region else 'Nationwide',
+                    report_date,
+                    sheet_forecast_type
+                ])
+        await run_in_threadpool(workbook.save, path)
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    filename = f"forecast_{sheets}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    # FileResponse streams the file in chunks; the temp file is removed once sent
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=filename,
+        background=BackgroundTask(os.remove, path)
+    )
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query("parquet", regex="^(arrow|parquet)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated column projection"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Bulk export of sales, county_daily, regional or forecasts as an Arrow IPC stream or Parquet file"""
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="Exports require pyarrow. Install with: pip install pyarrow"
+        )
+
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    media_type, extension = EXPORT_FORMATS[format]
+    fd, path = tempfile.mkstemp(suffix=extension)
+    os.close(fd)
+    try:
+        table = await data_exporter.table(dataset, selected, start, end)
+        await run_in_threadpool(write_table, table, format, path)
+    except ExportError as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    filename = f"{dataset}_{datetime.now().strftime('%Y%m%d')}{extension}"
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=filename,
+        headers={"X-Row-Count": str(table.num_rows)},
+        background=BackgroundTask(os.remove, path)
+    )
+
 @router.get("/farmer/{farmer_id}/download")
 async def download_farmer_report(
     farmer_id: str,
@@ -198,18 +224,76 @@ async def download_farmer_report(
 ):
     """Download farmer-specific forecast report"""
     try:
-        insights = await forecast_service.get_farmer_insights(farmer_id)
-        
-        if format == "csv":
-            return await download_forecast_csv(
-                forecast_type="monthly",
-                scope="county"
-            )
-        else:
-            return await download_forecast_pdf(
-                forecast_type="monthly",
-                scope="county"
-            )
+        insights, farmer_name = await asyncio.gather(
+            forecast_service.get_farmer_insights(farmer_id),
+            report_batch.farmer_name(farmer_id),
+        )
+        forecasts = insights["demand_forecasts"]
+
+        # Render from the forecasts the insights already computed rather than
+        # running a second forecast for the report body
+        content = await run_in_threadpool(
+            render_farmer_report, format, forecasts, "monthly", None, farmer_name, insights
+        )
+        filename = f"farmer_{farmer_id}_{datetime.now().strftime('%Y%m%d')}.{format}"
+        return StreamingResponse(
+            io.BytesIO(content),
+            media_type="text/csv" if format == "csv" else "application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="PDF generation requires reportlab. Install with: pip install reportlab"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def create_report_batch(request: ReportBatchRequest):
+    """Generate reports for all subscribed farmers (or the given farmers) in one run"""
+    if request.forecast_type not in ("daily", "weekly", "monthly", "seasonal"):
+        raise HTTPException(status_code=422, detail=f"Invalid forecast_type: {request.forecast_type}")
+    try:
+        manifest = await report_batch.generate(
+            farmer_ids=request.farmer_ids,
+            formats=request.formats,
+            forecast_type=request.forecast_type
+        )
+        return {"success": True, "data": manifest}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/batch/{batch_id}")
+async def get_report_batch(batch_id: str):
+    """Manifest of a generated batch: per-farmer files, emails and errors"""
+    try:
+        manifest = report_batch.load_manifest(batch_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Report batch not found")
+    return {"success": True, "data": manifest}
+
+@router.get("/batch/{batch_id}/{farmer_id}")
+async def download_batch_report(
+    batch_id: str,
+    farmer_id: str,
+    format: str = Query("pdf", regex="^(pdf|csv)$")
+):
+    """Download one farmer's report from a generated batch"""
+    try:
+        path = report_batch.report_path(batch_id, farmer_id, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Report not found in batch")
+    return FileResponse(
+        path,
+        media_type="text/csv" if format == "csv" else "application/pdf",
+        filename=f"farmer_{farmer_id}_{batch_id}.{format}"
+    )
@@ -0,0 +1,301 @@
+"""End-to-end load test for the AI service.
+
+Seeds a synthetic marketplace into a Mongo stand-in (mongomock-motor by default,
+or a real local mongod via --mongo-uri), swaps Redis for an in-process
+fakeredis, and drives a weighted mix of forecast, heatmap, report and admin
+traffic through the FastAPI app in-process at a target concurrency.
+
+Usage:
+    pip install -r requirements-loadtest.txt
+    python scripts/load_test.py --orders 20000 --concurrency 16 --duration 60 \\
+        --mix forecast=50,heatmap=20,report=10,admin=20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+AI_SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_SERVICE_DIR)
+
+CATEGORIES = ["Maize", "Beans", "Tomatoes", "Onions", "Potatoes", "Cabbage", "Carrots", "Kale", "Avocado", "Mangoes"]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def seed_marketplace(db, farmers: int, products: int, orders: int, days: int, seed: int) -> Dict[str, List]:
+    """Insert farmers, products, orders, subscriptions and audit logs; returns ids for traffic generation"""
+    from bson import ObjectId
+    from services.data_collector import COUNTY_COORDINATES
+
+    rng = random.Random(seed)
+    counties = list(COUNTY_COORDINATES.keys())
+    now = datetime.utcnow()
+
+    farmer_docs = [{
+        "_id": ObjectId(),
+        "role": "farmer",
+        "firstName": "Farmer",
+        "lastName": str(i),
+        "email": f"farmer{i}@example.com",
+        "verificationStatus": "approved",
+        "farmLocation": {"county": rng.choice(counties), "subCounty": "Central"},
+    } for i in range(farmers)]
+    await db.users.insert_many(farmer_docs)
+
+    product_docs = []
+    for i in range(products):
+        farmer = rng.choice(farmer_docs)
+        product_docs.append({
+            "_id": ObjectId(),
+            "name": f"Product {i}",
+            "farmer": farmer["_id"],
+            "category": rng.choice(CATEGORIES),
+            "price": round(rng.uniform(20, 300), 2),
+            "inventory": {"quantity": rng.randint(0, 500), "available": True},
+            "location": {"county": farmer["farmLocation"]["county"], "subCounty": "Central"},
+            "isActive": True,
+            "views": rng.randint(0, 2000),
+            "cartAdditions": rng.randint(0, 200),
+            "createdAt": now - timedelta(days=days),
+            "updatedAt": now - timedelta(days=rng.uniform(0, days)),
+        })
+    await db.products.insert_many(product_docs)
+
+    order_docs = []
+    for _ in range(orders):
+        created = now - timedelta(days=rng.uniform(0, days))
+        items = []
+        for product in rng.sample(product_docs, k=min(len(product_docs), rng.randint(1, 4))):
+            items.append({"product": product["_id"], "quantity": rng.randint(1, 25), "price": product["price"]})
+        order_docs.append({
+            "_id": ObjectId(),
+            "items": items,
+            "totalAmount": round(sum(item["quantity"] * item["price"] for item in items), 2),
+            "payment": {"status": "completed" if rng.random() < 0.9 else rng.choice(["pending", "failed"])},
+            "delivery": {"county": rng.choice(counties)},
+            "status": "delivered",
+            "createdAt": created,
+            "updatedAt": created + timedelta(hours=rng.uniform(1, 72)),
+        })
+    for start in range(0, len(order_docs), 5000):
+        await db.orders.insert_many(order_docs[start:start + 5000])
+
+    await db.subscriptions.insert_many([{
+        "farmer": farmer["_id"],
+        "status": "active",
+        "plan": "monthly",
+        "endDate": now + timedelta(days=rng.randint(1, 30)),
+    } for farmer in farmer_docs if rng.random() < 0.5])
+
+    await db.auditlogs.insert_many([{
+        "action": "ai_forecast_override",
+        "performedBy": "admin",
+        "targetType": "forecast",
+        "createdAt": now - timedelta(days=rng.uniform(0, days)),
+    } for _ in range(50)])
+
+    return {
+        "farmers": [str(f["_id"]) for f in farmer_docs],
+        "products": [str(p["_id"]) for p in product_docs],
+        "counties": counties,
+    }
+
+
+def build_traffic(ids: Dict[str, List], admin_token: str) -> Dict[str, List]:
+    """Request generators per traffic class: (route label, callable returning (path, headers))"""
+    admin_headers = {"X-Admin-Token": admin_token}
+    return {
+        "forecast": [
+            ("GET /forecasts/nationwide", lambda r: (f"/api/v1/forecasts/nationwide?forecast_type={r.choice(['daily', 'weekly', 'monthly', 'seasonal'])}", {})),
+            ("GET /forecasts/regional", lambda r: (f"/api/v1/forecasts/regional?county={r.choice(ids['counties'])}", {})),
+            ("GET /forecasts/price-recommendation", lambda r: (f"/api/v1/forecasts/price-recommendation/{r.choice(ids['products'])}", {})),
+            ("GET /forecasts/farmer-insights", lambda r: (f"/api/v1/forecasts/farmer-insights/{r.choice(ids['farmers'])}", {})),
+        ],
+        "heatmap": [
+            ("GET /forecasts/heatmap", lambda r: ("/api/v1/forecasts/heatmap", {})),
+        ],
+        "report": [
+            ("GET /reports/download/csv", lambda r: (f"/api/v1/reports/download/csv?forecast_type={r.choice(['weekly', 'monthly'])}", {})),
+            ("GET /reports/download/pdf", lambda r: ("/api/v1/reports/download/pdf?forecast_type=monthly", {})),
+        ],
+        "admin": [
+            ("GET /health", lambda r: ("/health", {})),
+            ("GET /admin/audit-logs", lambda r: ("/api/v1/admin/audit-logs?limit=20", {})),
+            ("GET /admin/admission", lambda r: ("/api/v1/admin/admission", {})),
+            ("GET /admin/models", lambda r: ("/api/v1/admin/models", admin_headers)),
+        ],
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def drive(app, traffic: Dict[str, List], mix: Dict[str, float], concurrency: int, duration: float,
+                max_requests: int, seed: int) -> Tuple[Dict[str, Dict], float]:
+    import httpx
+
+    classes = [name for name in mix if name in traffic and mix[name] > 0]
+    weights = [mix[name] for name in classes]
+    results: Dict[str, Dict] = defaultdict(lambda: {"latencies": [], "errors": 0, "shed": 0})
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int, client):
+        nonlocal issued
+        rng = random.Random(seed + worker_id)
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            label, make = rng.choice(traffic[rng.choices(classes, weights)[0]])
+            path, headers = make(rng)
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                status = response.status_code
+            except Exception:
+                status = 599
+            results[label]["latencies"].append(time.perf_counter() - start)
+            if status == 503:
+                results[label]["shed"] += 1
+            elif status >= 400:
+                results[label]["errors"] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+def summarize(results: Dict[str, Dict], elapsed: float) -> List[Dict]:
+    rows = []
+    for label, data in sorted(results.items()):
+        latencies = sorted(data["latencies"])
+        count = len(latencies)
+        rows.append({
+            "route": label,
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "error_rate": round(data["errors"] / count, 4) if count else 0,
+            "shed_rate": round(data["shed"] / count, 4) if count else 0,
+        })
+    return rows
+
+
+def print_report(rows: List[Dict], elapsed: float) -> None:
+    total = sum(row["requests"] for row in rows)
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)\n")
+    header = f"{'route':<38}{'reqs':>7}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err %':>7}{'shed %':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['route']:<38}{row['requests']:>7}{row['throughput_rps']:>8}{row['p50_ms']:>9}"
+            f"{row['p95_ms']:>9}{row['p99_ms']:>9}{row['error_rate'] * 100:>7.1f}{row['shed_rate'] * 100:>8.1f}"
+        )
+
+
+async def main(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="ai-loadtest-")
+    # Module-level settings are read at import time, so set them before importing the app
+    os.environ.setdefault("FEATURE_STORE_DIR", os.path.join(workdir, "feature_store"))
+    os.environ.setdefault("MODEL_STORE_DIR", os.path.join(workdir, "model_store"))
+    os.environ.setdefault("ADMIN_API_KEY", "loadtest")
+    os.environ["MONGODB_URI"] = args.mongo_uri or "mongodb://loadtest/agromarkethub_loadtest"
+
+    import fakeredis
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from mongomock_motor import AsyncMongoMockClient
+
+    import utils.database as database
+    import utils.redis_client as redis_client
+    from services.data_collector import DataCollector
+    from main import app
+
+    if args.mongo_uri:
+        database.client = AsyncIOMotorClient(args.mongo_uri)
+        db_name = database.get_database_name_from_uri(args.mongo_uri)
+        await database.client.drop_database(db_name)
+    else:
+        database.client = AsyncMongoMockClient()
+        db_name = "agromarkethub_loadtest"
+    database.database = database.client[db_name]
+    redis_client.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    if not args.live_weather:
+        async def offline_weather(self, lat, lon, days=5):
+            return []
+        # Avoid hitting OpenWeatherMap; forecasts fall back to the default weather summary
+        DataCollector.get_weather_data = offline_weather
+
+    print(f"Seeding {args.farmers} farmers, {args.products} products, {args.orders} orders over {args.days} days...")
+    seed_start = time.perf_counter()
+    ids = await seed_marketplace(database.database, args.farmers, args.products, args.orders, args.days, args.seed)
+    await database.ensure_indexes()
+    print(f"Seeded in {time.perf_counter() - seed_start:.1f}s")
+
+    traffic = build_traffic(ids, os.environ["ADMIN_API_KEY"])
+    mix = parse_mix(args.mix)
+    if args.warmup:
+        print(f"Warm-up: {args.warmup}s")
+        await drive(app, traffic, mix, args.concurrency, args.warmup, 0, args.seed + 1000)
+
+    print(f"Driving mix {mix} at concurrency {args.concurrency} for {args.duration}s...")
+    results, elapsed = await drive(app, traffic, mix, args.concurrency, args.duration, args.requests, args.seed)
+    rows = summarize(results, elapsed)
+    print_report(rows, elapsed)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "config": vars(args),
+                "elapsed_seconds": elapsed,
+                "routes": rows,
+            }, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+    from utils.worker_pool import close_process_pool
+    close_process_pool()
+    return 0
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Load test the AI service against local Mongo/Redis stand-ins")
+    parser.add_argument("--farmers", type=int, default=200)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=180, help="history span of the seeded orders")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured traffic")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0 = duration only)")
+    parser.add_argument("--warmup", type=float, default=0, help="seconds of unmeasured traffic first")
+    parser.add_argument("--mix", default="forecast=50,heatmap=20,report=10,admin=20")
+    parser.add_argument("--mongo-uri", help="use a real (local) MongoDB instead of mongomock; the database is dropped first")
+    parser.add_argument("--live-weather", action="store_true", help="call OpenWeatherMap instead of the offline default")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the report to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args(sys.argv[1:]))))
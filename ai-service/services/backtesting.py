@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.forecast_service import (
+    ForecastService,
+    FORECAST_HORIZON,
+    FORECAST_RESOLUTION,
+    BACKTEST_REPORT_KEY,
+    finish_series,
+    load_backtest_report,
+    training_series,
+)
+from utils.redis_client import get_redis_client
+from utils.worker_pool import run_in_process
+
+ENGINES = ["lstm", "prophet", "combined", "baseline"]
+BACKTEST_FOLDS = int(os.getenv("BACKTEST_FOLDS", 4))
+# Maximum acceptable sMAPE (%) when routing a forecast type to its cheapest engine
+BACKTEST_ACCURACY_TARGET = float(os.getenv("BACKTEST_ACCURACY_TARGET", 25))
+BACKTEST_STATUS_KEY = "backtest:status"
+
+# Backtest started from the admin API on this replica
+_background_run: Optional[asyncio.Task] = None
+
+
+def mape(actual: np.ndarray, predicted: np.ndarray) -> Optional[float]:
+    """Mean absolute percentage error, skipping zero actuals"""
+    mask = actual != 0
+    if not mask.any():
+        return None
+    return float(np.mean(np.abs((actual[mask] - predicted[mask]) / actual[mask])) * 100)
+
+
+def smape(actual: np.ndarray, predicted: np.ndarray) -> Optional[float]:
+    """Symmetric MAPE, bounded to [0, 200]"""
+    denominator = np.abs(actual) + np.abs(predicted)
+    mask = denominator != 0
+    if not mask.any():
+        return None
+    return float(np.mean(2 * np.abs(actual[mask] - predicted[mask]) / denominator[mask]) * 100)
+
+
+def evaluate_fold(train: pd.DataFrame, test: pd.DataFrame, horizon: int, resolution: str = "D") -> Dict[str, Dict]:
+    """Fit every engine on one training window and score it on the next horizon (runs in pool workers).
+
+    Engines train at the forecast type's serving resolution and are scored on
+    the daily values they would be served as. `test` holds one row per
+    calendar day of the horizon; forecasts start the day after the last
+    training row, so days between that and the test window are forecast and
+    skipped.
+    """
+    service = ForecastService()
+    actual = test["y"].values.astype(float)[:horizon]
+    gap = max(0, (pd.to_datetime(test["ds"]).min() - pd.to_datetime(train["ds"]).max()).days - 1)
+    series, steps, _, freq = training_series(train, horizon + gap, None, resolution)
+
+    def served(values):
+        if not values:
+            return None
+        return finish_series([float(v) for v in values], train, horizon + gap, resolution)[gap:]
+
+    training: Dict = {}
+    start = time.perf_counter()
+    lstm_raw = service._forecast_with_lstm(series, steps, model_key=None, training=training)
+    lstm_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prophet_raw = service._forecast_with_prophet(series, steps, freq, model_key=None)
+    prophet_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    baseline_values = served(service._combine_forecasts(series, None, None, steps))
+    baseline_seconds = time.perf_counter() - start
+
+    lstm_values = served(lstm_raw)
+    prophet_values = served(prophet_raw)
+    combined_values = None
+    if lstm_raw and prophet_raw:
+        combined_values = served(service._combine_forecasts(series, lstm_raw, prophet_raw, steps))
+
+    predictions = {
+        "lstm": (lstm_values, lstm_seconds),
+        "prophet": (prophet_values, prophet_seconds),
+        # Served forecasts fit both engines in parallel workers
+        "combined": (combined_values, max(lstm_seconds, prophet_seconds)),
+        "baseline": (baseline_values, baseline_seconds),
+    }
+
+    results = {}
+    for engine, (values, seconds) in predictions.items():
+        if not values:
+            continue
+        predicted = np.array(values, dtype=float)[:len(actual)]
+        results[engine] = {
+            "mape": mape(actual, predicted),
+            "smape": smape(actual, predicted),
+            "seconds": seconds,
+        }
+    if "lstm" in results:
+        results["lstm"]["epochs"] = training.get("epochs")
+    return results
+
+
+def rolling_origins(dates: pd.Series, horizon: int, folds: int, min_train: int = 30) -> List[pd.Timestamp]:
+    """First test day of each fold, spaced one horizon of calendar days apart and ending at the latest data.
+
+    Folds are laid out in days rather than rows so a sparse series (days
+    without sales) still tests each fold on exactly `horizon` days.
+    """
+    dates = pd.to_datetime(dates)
+    end = dates.max() + pd.Timedelta(days=1)
+    origins = []
+    for fold in range(folds, 0, -1):
+        origin = end - pd.Timedelta(days=fold * horizon)
+        if (dates < origin).sum() >= min_train:
+            origins.append(origin)
+    return origins
+
+
+def fold_window(ts: pd.DataFrame, origin: pd.Timestamp, horizon: int):
+    """Training rows before origin and one row per calendar day of the test horizon (no sales = 0)"""
+    ds = pd.to_datetime(ts["ds"])
+    train = ts[ds < origin].reset_index(drop=True)
+    days = pd.date_range(origin, periods=horizon, freq="D")
+    test = ts[(ds >= origin) & (ds < days[-1] + pd.Timedelta(days=1))]
+    actual = test.groupby(pd.to_datetime(test["ds"]))["y"].sum().reindex(days, fill_value=0.0)
+    return train, pd.DataFrame({"ds": days, "y": actual.values.astype(float)})
+
+
+def _summarize(fold_results: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    summary = {}
+    for engine in ENGINES:
+        scores = [fold[engine] for fold in fold_results if engine in fold]
+        if not scores:
+            continue
+        mapes = [s["mape"] for s in scores if s["mape"] is not None]
+        smapes = [s["smape"] for s in scores if s["smape"] is not None]
+        summary[engine] = {
+            "folds": len(scores),
+            "mape": round(float(np.mean(mapes)), 2) if mapes else None,
+            "smape": round(float(np.mean(smapes)), 2) if smapes else None,
+            "avg_seconds": round(float(np.mean([s["seconds"] for s in scores])), 4),
+        }
+        epochs = [s["epochs"] for s in scores if s.get("epochs") is not None]
+        if epochs:
+            summary[engine]["avg_epochs"] = round(float(np.mean(epochs)), 1)
+    return summary
+
+
+def choose_engine(summary: Dict[str, Dict], accuracy_target: float = BACKTEST_ACCURACY_TARGET) -> Optional[str]:
+    """Cheapest engine meeting the sMAPE target, else the most accurate one"""
+    scored = {engine: stats for engine, stats in summary.items() if stats["smape"] is not None}
+    if not scored:
+        return None
+    qualifying = [engine for engine, stats in scored.items() if stats["smape"] <= accuracy_target]
+    if qualifying:
+        return min(qualifying, key=lambda engine: scored[engine]["avg_seconds"])
+    return min(scored, key=lambda engine: scored[engine]["smape"])
+
+
+async def run_backtest(
+    ts: pd.DataFrame,
+    forecast_types: Optional[List[str]] = None,
+    folds: int = BACKTEST_FOLDS,
+    accuracy_target: float = BACKTEST_ACCURACY_TARGET,
+) -> Dict:
+    """Replay history with rolling origins for each forecast type, folds in parallel processes"""
+    forecast_types = forecast_types or list(FORECAST_HORIZON.keys())
+    report = {
+        "generatedAt": datetime.now().isoformat(),
+        "observations": len(ts),
+        "accuracyTarget": accuracy_target,
+        "forecastTypes": {},
+        "routing": {},
+    }
+
+    for forecast_type in forecast_types:
+        horizon = FORECAST_HORIZON.get(forecast_type, 30)
+        resolution = FORECAST_RESOLUTION.get(forecast_type, "D")
+        origins = rolling_origins(ts["ds"], horizon, folds)
+        tasks = [
+            run_in_process(evaluate_fold, *fold_window(ts, origin, horizon), horizon, resolution, timeout=None)
+            for origin in origins
+        ]
+        fold_results = await asyncio.gather(*tasks) if tasks else []
+        summary = _summarize(fold_results)
+        report["forecastTypes"][forecast_type] = {
+            "horizon": horizon,
+            "resolution": resolution,
+            "folds": len(origins),
+            "engines": summary,
+        }
+        engine = choose_engine(summary, accuracy_target)
+        if engine:
+            report["routing"][forecast_type] = engine
+
+    return report
+
+
+async def backtest_sales_history(
+    days: int = 365,
+    forecast_types: Optional[List[str]] = None,
+    folds: int = BACKTEST_FOLDS,
+    accuracy_target: float = BACKTEST_ACCURACY_TARGET,
+) -> Dict:
+    """Backtest on the aggregate sales series and store the report for engine routing"""
+    service = ForecastService()
+    sales_df = await service.data_collector.get_sales_data(days=days)
+    if sales_df.empty:
+        raise ValueError("No sales history available for backtesting")
+
+    ts = service._prepare_time_series(sales_df)
+    report = await run_backtest(ts, forecast_types, folds, accuracy_target)
+    # Kept in Redis (no expiry) so every replica routes on the same report
+    redis_client = await get_redis_client()
+    await redis_client.set(BACKTEST_REPORT_KEY, json.dumps(report))
+    return report
+
+
+async def load_report() -> Optional[Dict]:
+    return await load_backtest_report()
+
+
+async def _set_status(status: Dict) -> None:
+    redis_client = await get_redis_client()
+    await redis_client.set(BACKTEST_STATUS_KEY, json.dumps(status))
+
+
+async def load_status() -> Optional[Dict]:
+    """Status of the latest admin-started backtest (from any replica)"""
+    redis_client = await get_redis_client()
+    stored = await redis_client.get(BACKTEST_STATUS_KEY)
+    return json.loads(stored) if stored else None
+
+
+async def start_backtest(
+    forecast_types: Optional[List[str]] = None,
+    folds: int = BACKTEST_FOLDS,
+    accuracy_target: float = BACKTEST_ACCURACY_TARGET,
+) -> Dict:
+    """Run backtest_sales_history in the background; returns its status (the running one if already started)"""
+    global _background_run
+    if _background_run is not None and not _background_run.done():
+        return await load_status()
+
+    status = {
+        "state": "running",
+        "startedAt": datetime.now().isoformat(),
+        "forecastTypes": forecast_types,
+        "folds": folds,
+        "accuracyTarget": accuracy_target,
+    }
+    await _set_status(status)
+
+    async def run():
+        try:
+            report = await backtest_sales_history(forecast_types, folds, accuracy_target)
+            status.update(state="completed", routing=report["routing"])
+        except Exception as e:
+            print(f"Backtest failed: {e}")
+            status.update(state="failed", error=str(e))
+        status["finishedAt"] = datetime.now().isoformat()
+        await _set_status(status)
+
+    _background_run = asyncio.create_task(run())
+    return status
+
+
+async def _main(argv: List[str]) -> int:
+    from utils.database import connect_db, close_db
+
+    forecast_types = [arg for arg in argv if arg in FORECAST_HORIZON] or None
+    await connect_db()
+    try:
+        report = await backtest_sales_history(forecast_types=forecast_types)
+    finally:
+        await close_db()
+
+    for forecast_type, result in report["forecastTypes"].items():
+        print(f"{forecast_type} (horizon {result['horizon']}, {result['folds']} folds)")
+        for engine, stats in result["engines"].items():
+            print(f"  {engine:<9} MAPE={stats['mape']} sMAPE={stats['smape']} avg_seconds={stats['avg_seconds']}")
+        print(f"  -> routed to {report['routing'].get(forecast_type, 'n/a')}")
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage: python -m services.backtesting [weekly] [monthly] [seasonal]
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
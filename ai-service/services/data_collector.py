@@ -2,7 +2,7 @@ import requests
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from utils.database import get_database
+from utils.database import get_analytics_database, analytics_options, ANALYTICS_MAX_TIME_MS
 import pandas as pd
 
 COUNTY_COORDINATES = {
@@ -69,7 +69,7 @@ class DataCollector:
 
     async def get_sales_data(self, days: int = 120) -> pd.DataFrame:
         """Fetch historical sales data joined with product metadata"""
-        db = get_database()
+        db = get_analytics_database()
         cutoff_date = datetime.now() - timedelta(days=days)
         
         pipeline = [
@@ -107,7 +107,7 @@ class DataCollector:
             }
         ]
         
-        orders = await db.orders.aggregate(pipeline).to_list(length=None)
+        orders = await db.orders.aggregate(pipeline, **analytics_options()).to_list(length=None)
         records = []
         for order in orders:
             key = order["_id"]
@@ -125,12 +125,12 @@ class DataCollector:
     
     async def get_buyer_behavior_data(self, days: int = 30) -> pd.DataFrame:
         """Fetch buyer behavior data (views, cart additions)"""
-        db = get_database()
+        db = get_analytics_database()
         cutoff_date = datetime.now() - timedelta(days=days)
         
         products = await db.products.find({
             "updatedAt": {"$gte": cutoff_date}
-        }).to_list(length=None)
+        }).max_time_ms(ANALYTICS_MAX_TIME_MS).to_list(length=None)
         
         data = []
         for product in products:
@@ -145,7 +145,7 @@ class DataCollector:
     
     async def get_price_history(self, product_id: str = None, days: int = 120) -> pd.DataFrame:
         """Fetch historical price data"""
-        db = get_database()
+        db = get_analytics_database()
         cutoff_date = datetime.now() - timedelta(days=days)
         
         query = {"updatedAt": {"$gte": cutoff_date}}
@@ -154,7 +154,7 @@ class DataCollector:
         
         # This would need a price history collection
         # For now, using product updates as proxy
-        products = await db.products.find(query).to_list(length=None)
+        products = await db.products.find(query).max_time_ms(ANALYTICS_MAX_TIME_MS).to_list(length=None)
         data = []
         for product in products:
             data.append({
@@ -165,15 +165,22 @@ class DataCollector:
         
         return pd.DataFrame(data)
 
-    async def get_regional_sales(self, days: int = 60) -> pd.DataFrame:
-        """Aggregate orders by county for heatmap analysis"""
-        db = get_database()
-        cutoff_date = datetime.now() - timedelta(days=days)
+    async def get_regional_sales(
+        self,
+        days: int = 60,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Aggregate orders by county for heatmap analysis (over [start, end] when given, else the last `days`)"""
+        db = get_analytics_database()
+        created_at = {"$gte": start or datetime.now() - timedelta(days=days)}
+        if end is not None:
+            created_at["$lte"] = end
         pipeline = [
             {
                 "$match": {
                     "payment.status": "completed",
-                    "createdAt": {"$gte": cutoff_date}
+                    "createdAt": created_at
                 }
             },
             {
@@ -186,7 +193,7 @@ class DataCollector:
             }
         ]
 
-        regions = await db.orders.aggregate(pipeline).to_list(length=None)
+        regions = await db.orders.aggregate(pipeline, **analytics_options()).to_list(length=None)
         records = []
         for region in regions:
             if not region["_id"]:
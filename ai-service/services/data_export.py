@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from services.data_collector import DataCollector
+from services.feature_store import feature_store, FEATURE_STORE_ENABLED, PYARROW_AVAILABLE
+from utils.database import get_analytics_database, ANALYTICS_MAX_TIME_MS
+
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+# Dataset -> (columns, date column or None)
+DATASETS: Dict[str, tuple] = {
+    "sales": (
+        ["date", "product_id", "product_name", "category", "county", "quantity", "revenue", "avg_price"],
+        "date",
+    ),
+    "county_daily": (
+        ["date", "county", "quantity", "revenue", "avg_price", "rolling_mean_7", "dayofweek", "month"],
+        "date",
+    ),
+    "regional": (
+        ["county", "total_orders", "total_revenue", "avg_delivery_time"],
+        None,
+    ),
+    "forecasts": (
+        [
+            "forecastDate", "forecastType", "scope", "county", "subCounty", "crop", "demand",
+            "confidence", "priceRecommendation", "region", "modelVersion", "isOverridden",
+        ],
+        "forecastDate",
+    ),
+}
+
+DEFAULT_EXPORT_DAYS = 180
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _naive(value: datetime) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+
+def _window(start: Optional[datetime], end: Optional[datetime]) -> tuple:
+    end_ts = _naive(end) if end else pd.Timestamp(datetime.now())
+    start_ts = _naive(start) if start else end_ts.normalize() - pd.Timedelta(days=DEFAULT_EXPORT_DAYS)
+    if start_ts > end_ts:
+        raise ExportError("start must not be after end")
+    return start_ts, end_ts
+
+
+def _project(df: pd.DataFrame, dataset: str, columns: Optional[List[str]]) -> pd.DataFrame:
+    return df.reindex(columns=columns or DATASETS[dataset][0]).reset_index(drop=True)
+
+
+class DataExporter:
+    """Exports sales features, regional aggregates and forecast snapshots as Arrow tables.
+
+    Columns are projected and dates filtered before the data is materialized:
+    Parquet-backed datasets push both down to the feature store scan, Mongo-backed
+    ones to the query. Tables are written as Arrow IPC streams or zstd Parquet.
+    """
+
+    def __init__(self):
+        self.data_collector = DataCollector()
+
+    async def frame(
+        self,
+        dataset: str,
+        columns: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        if dataset not in DATASETS:
+            raise ExportError(f"Unknown dataset: {dataset}")
+        all_columns, date_column = DATASETS[dataset]
+        unknown = [column for column in columns or [] if column not in all_columns]
+        if unknown:
+            raise ExportError(f"Unknown columns for {dataset}: {', '.join(unknown)}")
+
+        start_ts, end_ts = _window(start, end)
+        if dataset == "forecasts":
+            df = await self._forecast_snapshots(start_ts, end_ts)
+        elif dataset == "regional":
+            # Aggregated per county, so the window is applied to the orders in the query
+            df = await self.data_collector.get_regional_sales(
+                start=start_ts.normalize().to_pydatetime(), end=end_ts.to_pydatetime()
+            )
+        elif FEATURE_STORE_ENABLED:
+            table = "sales" if dataset == "sales" else "county"
+            # The date filter column must be read even when it isn't exported
+            read_columns = sorted(set(columns) | {date_column}) if columns else None
+            df = await feature_store.read_table(table, read_columns, start_ts.normalize(), end_ts)
+        elif dataset == "sales":
+            days = max(1, (pd.Timestamp(datetime.now()) - start_ts).days + 1)
+            df = await self.data_collector.get_sales_data(days=days)
+            if not df.empty:
+                df["date"] = pd.to_datetime(df["date"])
+        else:
+            raise ExportError("county_daily requires the feature store (pyarrow)")
+
+        if date_column and not df.empty:
+            df = df[(df[date_column] >= start_ts.normalize()) & (df[date_column] <= end_ts)]
+        return _project(df, dataset, columns)
+
+    async def _forecast_snapshots(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """One row per crop forecast in every stored forecast document"""
+        db = get_analytics_database()
+        if db is None:
+            raise ValueError("Database connection is not initialized")
+        cursor = db.aiforecasts.find(
+            {"forecastDate": {"$gte": start.to_pydatetime(), "$lte": end.to_pydatetime()}},
+            {"forecastDate": 1, "forecastType": 1, "scope": 1, "region": 1, "forecasts": 1, "modelVersion": 1, "isOverridden": 1},
+        ).max_time_ms(ANALYTICS_MAX_TIME_MS)
+        records = []
+        async for document in cursor:
+            region = document.get("region") or {}
+            for forecast in document.get("forecasts", []):
+                records.append({
+                    "forecastDate": document.get("forecastDate"),
+                    "forecastType": document.get("forecastType"),
+                    "scope": document.get("scope"),
+                    "county": region.get("county"),
+                    "subCounty": region.get("subCounty"),
+                    "crop": forecast.get("crop"),
+                    "demand": forecast.get("demand"),
+                    "confidence": forecast.get("confidence"),
+                    "priceRecommendation": forecast.get("priceRecommendation"),
+                    "region": forecast.get("region"),
+                    "modelVersion": document.get("modelVersion"),
+                    "isOverridden": bool(document.get("isOverridden", False)),
+                })
+        df = pd.DataFrame(records)
+        if not df.empty:
+            df["forecastDate"] = pd.to_datetime(df["forecastDate"])
+        return df
+
+    async def table(self, dataset: str, columns: Optional[List[str]] = None, start=None, end=None):
+        import pyarrow as pa
+
+        df = await self.frame(dataset, columns, start, end)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_table(table, fmt: str, path: str) -> None:
+    """Write an Arrow table as an IPC stream or Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        pq.write_table(table, path, compression="zstd")
+    elif fmt == "arrow":
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ExportError(f"Unknown export format: {fmt}")
+
+
+data_exporter = DataExporter()
+
+
+def _parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Export sales features, regional aggregates or forecasts")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--columns", help="Comma-separated column projection")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="ISO start date (default: 180 days ago)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="ISO end date (default: now)")
+    parser.add_argument("--output", help="Output path (default: <dataset><extension>)")
+    return parser.parse_args(argv)
+
+
+async def _main(argv: List[str]) -> int:
+    from utils.database import connect_db, close_db
+
+    if not PYARROW_AVAILABLE:
+        print("Exports require pyarrow. Install with: pip install pyarrow")
+        return 1
+
+    args = _parse_args(argv)
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+    output = args.output or args.dataset + EXPORT_FORMATS[args.format][1]
+
+    await connect_db()
+    try:
+        table = await data_exporter.table(args.dataset, columns, args.start, args.end)
+    finally:
+        await close_db()
+    write_table(table, args.format, output)
+    print(f"Exported {table.num_rows} rows x {table.num_columns} columns to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage: python -m services.data_export sales --format arrow --columns date,category,quantity --start 2024-01-01
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,252 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from pymongo.errors import OperationFailure
+
+from utils.database import get_database
+from utils.redis_client import get_redis_client
+
+REALTIME_COUNTERS_ENABLED = os.getenv("REALTIME_COUNTERS_ENABLED", "true").lower() == "true"
+# Poll interval (seconds) when the deployment doesn't support change streams
+REALTIME_POLL_INTERVAL = float(os.getenv("REALTIME_POLL_INTERVAL", 30))
+
+BUCKET_KEY = "demand:bucket:"
+SEEN_KEY = "demand:seen:"
+WATERMARK_KEY = "demand:watermark"
+RESUME_TOKEN_KEY = "demand:resume_token"
+POLL_PAGE_SIZE = 500
+WINDOW_HOURS = 24
+# Buckets are kept for two windows so the previous 24h can be compared
+BUCKET_TTL = 2 * WINDOW_HOURS * 3600 + 3600
+NATIONWIDE = "*"
+# ChangeStreamHistoryLost / ChangeStreamFatalError: the resume token fell off the oplog
+RESUME_FAILED_CODES = (280, 286)
+
+
+def _bucket_name(moment: datetime) -> str:
+    return BUCKET_KEY + moment.strftime("%Y%m%d%H")
+
+
+def project_daily_demand(quantity: float, prior: float) -> float:
+    """Next-day demand from the last 24h, damped by the trend against the 24h before"""
+    # Damp the day-over-day trend so one busy day doesn't double the forecast
+    trend = min(1.5, max(0.5, quantity / prior)) if prior else 1.0
+    return quantity * (1 + (trend - 1) * 0.5)
+
+
+def daily_forecasts(current: Dict[str, Dict], previous: Dict[str, Dict], region_label: str, limit: int) -> List[Dict]:
+    """Forecast entries for the top categories of a 24h window, in the shape ForecastService returns"""
+    forecasts = []
+    top = sorted(current.items(), key=lambda item: item[1]["quantity"], reverse=True)[:limit]
+    for category, totals in top:
+        quantity = totals["quantity"]
+        prior = previous.get(category, {}).get("quantity", 0)
+        expected = project_daily_demand(quantity, prior)
+        avg_price = totals["revenue"] / quantity if quantity else 0
+        forecasts.append({
+            "crop": category,
+            "demand": round(min(100, max(30, expected)), 2),
+            "confidence": 70 if prior else 60,
+            "priceRecommendation": round(avg_price * 1.05, 2),
+            "region": region_label,
+        })
+    return forecasts
+
+
+class DemandCounters:
+    """Sliding-window demand counters per category and county, kept in Redis.
+
+    Completed orders are counted once (deduplicated by order id) into hourly
+    hash buckets keyed by the UTC hour they were paid (Mongo stores naive UTC
+    datetimes); a 24h window is read back with a fixed number of HGETALLs.
+    """
+
+    def __init__(self):
+        self._category_cache: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _product_info(self, product_ids: List) -> Dict[str, Dict]:
+        missing = [pid for pid in product_ids if str(pid) not in self._category_cache]
+        if missing:
+            db = get_database()
+            products = await db.products.find(
+                {"_id": {"$in": missing}},
+                {"category": 1}
+            ).to_list(length=None)
+            for product in products:
+                self._category_cache[str(product["_id"])] = {"category": product.get("category")}
+        return {str(pid): self._category_cache.get(str(pid), {}) for pid in product_ids}
+
+    async def record_order(self, order: Dict) -> bool:
+        """Add a completed order to the counters; returns False if it was already counted"""
+        if order.get("payment", {}).get("status") != "completed":
+            return False
+
+        # Later updates (rider assigned, delivered) re-match completed orders;
+        # anything paid before the counted windows is never demand again, even
+        # once its dedupe key has expired
+        paid_at = order.get("payment", {}).get("paidAt") or order.get("createdAt") or datetime.utcnow()
+        if paid_at < datetime.utcnow() - timedelta(hours=2 * WINDOW_HOURS):
+            return False
+
+        redis_client = await get_redis_client()
+        order_id = str(order["_id"])
+        first_time = await redis_client.set(SEEN_KEY + order_id, 1, nx=True, ex=BUCKET_TTL)
+        if not first_time:
+            return False
+
+        items = order.get("items", [])
+        info = await self._product_info([item.get("product") for item in items if item.get("product")])
+        county = order.get("delivery", {}).get("county") or "Unknown"
+        bucket = _bucket_name(paid_at)
+
+        pipe = redis_client.pipeline()
+        for item in items:
+            category = info.get(str(item.get("product")), {}).get("category") or "Mixed Produce"
+            quantity = float(item.get("quantity", 0))
+            revenue = quantity * float(item.get("price", 0))
+            for region in (county, NATIONWIDE):
+                pipe.hincrbyfloat(bucket, f"{category}|{region}|q", quantity)
+                pipe.hincrbyfloat(bucket, f"{category}|{region}|r", revenue)
+        pipe.expire(bucket, BUCKET_TTL)
+        await pipe.execute()
+        return True
+
+    async def get_window(self, county: Optional[str] = None, hours_ago: int = 0) -> Dict[str, Dict]:
+        """Quantity and revenue per category over the 24h window ending hours_ago hours back"""
+        windows = await self.get_window_by_region(hours_ago, region=county or NATIONWIDE)
+        return windows.get(county or NATIONWIDE, {})
+
+    async def get_window_by_region(self, hours_ago: int = 0, region: Optional[str] = None) -> Dict[str, Dict[str, Dict]]:
+        """Per-region (county or NATIONWIDE) category totals over one 24h window"""
+        redis_client = await get_redis_client()
+        end = datetime.utcnow() - timedelta(hours=hours_ago)
+        pipe = redis_client.pipeline()
+        for offset in range(WINDOW_HOURS):
+            pipe.hgetall(_bucket_name(end - timedelta(hours=offset)))
+        buckets = await pipe.execute()
+
+        totals: Dict[str, Dict[str, Dict]] = {}
+        for bucket in buckets:
+            for field, value in (bucket or {}).items():
+                category, field_region, metric = field.rsplit("|", 2)
+                if region is not None and field_region != region:
+                    continue
+                entry = totals.setdefault(field_region, {}).setdefault(category, {"quantity": 0.0, "revenue": 0.0})
+                entry["quantity" if metric == "q" else "revenue"] += float(value)
+        return totals
+
+    async def _record_page(self, updated_at: datetime, order_id: Optional[ObjectId]) -> Tuple[datetime, Optional[ObjectId], bool]:
+        """Count the next page of completed orders after (updatedAt, _id).
+
+        Returns the position of the last order read and whether the page was full.
+        """
+        db = get_database()
+        query = {"payment.status": "completed"}
+        if order_id is None:
+            query["updatedAt"] = {"$gte": updated_at}
+        else:
+            # _id breaks ties so orders sharing the last timestamp aren't skipped
+            query["$or"] = [
+                {"updatedAt": {"$gt": updated_at}},
+                {"updatedAt": updated_at, "_id": {"$gt": order_id}},
+            ]
+        orders = await db.orders.find(query).sort(
+            [("updatedAt", 1), ("_id", 1)]
+        ).limit(POLL_PAGE_SIZE).to_list(length=POLL_PAGE_SIZE)
+        for order in orders:
+            await self.record_order(order)
+        if orders:
+            updated_at, order_id = orders[-1]["updatedAt"], orders[-1]["_id"]
+        return updated_at, order_id, len(orders) == POLL_PAGE_SIZE
+
+    async def _catch_up(self, since: datetime):
+        """Count every completed order updated since the given time"""
+        updated_at, order_id, full = since, None, True
+        while full:
+            updated_at, order_id, full = await self._record_page(updated_at, order_id)
+
+    async def _consume_stream(self, resume_token: Optional[Dict]):
+        db = get_database()
+        redis_client = await get_redis_client()
+        pipeline = [{"$match": {
+            "operationType": {"$in": ["insert", "update", "replace"]},
+            "fullDocument.payment.status": "completed",
+        }}]
+        async with db.orders.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+            print("Demand counters watching orders change stream")
+            if resume_token is None:
+                # Nothing to resume from: count what completed while nobody was
+                # watching. The stream is already open, so nothing falls in between
+                await self._catch_up(datetime.utcnow() - timedelta(hours=2 * WINDOW_HOURS))
+            async for change in stream:
+                if change.get("fullDocument"):
+                    await self.record_order(change["fullDocument"])
+                await redis_client.set(RESUME_TOKEN_KEY, json_util.dumps(change["_id"]))
+
+    async def _watch_change_stream(self):
+        redis_client = await get_redis_client()
+        stored = await redis_client.get(RESUME_TOKEN_KEY)
+        resume_token = json_util.loads(stored) if stored else None
+        try:
+            await self._consume_stream(resume_token)
+        except OperationFailure as e:
+            if resume_token is None or e.code not in RESUME_FAILED_CODES:
+                raise
+            print("Demand counters resume token expired, backfilling from orders")
+            await redis_client.delete(RESUME_TOKEN_KEY)
+            await self._consume_stream(None)
+
+    async def _poll(self):
+        redis_client = await get_redis_client()
+        print("Demand counters polling orders (change streams unavailable)")
+        while True:
+            stored = await redis_client.get(WATERMARK_KEY)
+            if stored:
+                # "<updatedAt>|<_id>"; older watermarks carry only the timestamp
+                stamp, _, last_id = stored.partition("|")
+                updated_at, order_id = datetime.fromisoformat(stamp), ObjectId(last_id) if last_id else None
+            else:
+                updated_at, order_id = datetime.utcnow() - timedelta(hours=2 * WINDOW_HOURS), None
+            updated_at, order_id, full = await self._record_page(updated_at, order_id)
+            if order_id is not None:
+                await redis_client.set(WATERMARK_KEY, f"{updated_at.isoformat()}|{order_id}")
+            if not full:
+                await asyncio.sleep(REALTIME_POLL_INTERVAL)
+
+    async def _run(self):
+        delay = 1
+        while True:
+            try:
+                try:
+                    await self._watch_change_stream()
+                except Exception as e:
+                    # Standalone servers reject $changeStream; fall back to polling
+                    if "replica set" not in str(e).lower() and "changestream" not in str(e).lower():
+                        raise
+                    await self._poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Demand counter watcher error, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    def start(self):
+        if self._task is None and REALTIME_COUNTERS_ENABLED:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+demand_counters = DemandCounters()
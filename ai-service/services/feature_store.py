@@ -0,0 +1,278 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+
+from services import model_store
+from services.data_collector import DataCollector
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+FEATURE_STORE_DIR = os.getenv(
+    "FEATURE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".feature_store")
+)
+FEATURE_STORE_ENABLED = PYARROW_AVAILABLE and os.getenv("FEATURE_STORE_ENABLED", "true").lower() == "true"
+# Seconds before a read triggers an incremental refresh from Mongo
+FEATURE_STORE_MAX_AGE = int(os.getenv("FEATURE_STORE_MAX_AGE", 3600))
+FEATURE_STORE_HISTORY_DAYS = int(os.getenv("FEATURE_STORE_HISTORY_DAYS", 365))
+
+META_KEY = "feature_store:meta"
+ROLLING_DAYS = 7
+PRICE_ROLLING_WINDOW = 5
+PRICE_FEATURES = ["dayofweek", "month", "trend", "rolling_mean"]
+
+
+def _add_calendar_features(df: pd.DataFrame, date_column: str) -> pd.DataFrame:
+    df["dayofweek"] = df[date_column].dt.dayofweek
+    df["month"] = df[date_column].dt.month
+    return df
+
+
+class FeatureStore:
+    """Per-day sales, category, county and product feature tables stored as Parquet.
+
+    Each refresh only pulls the days (and product updates) since the last stored
+    date from Mongo; the last stored day is re-fetched since it may have been
+    partial. Readers get column/date slices without touching Mongo.
+    """
+
+    def __init__(self, data_collector: Optional[DataCollector] = None):
+        self.data_collector = data_collector or DataCollector()
+        self._lock = asyncio.Lock()
+
+    # Storage
+
+    def _path(self, table: str) -> str:
+        return os.path.join(FEATURE_STORE_DIR, f"{table}.parquet")
+
+    def _read(self, table: str, columns: Optional[List[str]] = None, filters: Optional[List] = None) -> pd.DataFrame:
+        path = self._path(table)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters)
+
+    def _write(self, table: str, df: pd.DataFrame) -> None:
+        """Replace a table atomically; the unique temp file keeps concurrent writers
+        (other uvicorn workers, the CLI) from clobbering each other before the rename"""
+        os.makedirs(FEATURE_STORE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=FEATURE_STORE_DIR, prefix=f"{table}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                df.reset_index(drop=True).to_parquet(f, engine="pyarrow", compression="zstd", index=False)
+            os.replace(tmp_path, self._path(table))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # Refresh
+
+    def _grouped_features(self, existing: pd.DataFrame, new_sales: pd.DataFrame, key: Optional[str], since) -> pd.DataFrame:
+        """Replace rows from `since` on with freshly grouped ones and roll features over a short lookback"""
+        group_columns = ["date", key] if key else ["date"]
+        grouped = new_sales.groupby(group_columns, dropna=False).agg(
+            quantity=("quantity", "sum"),
+            revenue=("revenue", "sum"),
+            avg_price=("avg_price", "mean"),
+        ).reset_index()
+
+        if not existing.empty and since is not None:
+            existing = existing[existing["date"] < since]
+        table = pd.concat([existing, grouped], ignore_index=True) if not existing.empty else grouped
+        table = table.sort_values(group_columns).reset_index(drop=True)
+
+        # Only rows from `since` change, and a 7-calendar-day window needs the
+        # 6 days before it. The window is time-based rather than 7 rows so gaps
+        # (days without sales) give the same values here as in a full rebuild
+        lookback_start = since - pd.Timedelta(days=ROLLING_DAYS - 1) if since is not None else table["date"].min()
+        tail = table[table["date"] >= lookback_start]
+        window = f"{ROLLING_DAYS}D"
+        if key:
+            rolling = tail.groupby(key, dropna=False, group_keys=False)[["date", "quantity"]].apply(
+                lambda group: group.rolling(window, on="date", min_periods=1)["quantity"].mean()
+            )
+        else:
+            rolling = tail.rolling(window, on="date", min_periods=1)["quantity"].mean()
+        update_index = tail.index[tail["date"] >= (since if since is not None else lookback_start)]
+        table.loc[update_index, "rolling_mean_7"] = rolling.loc[update_index]
+        return _add_calendar_features(table, "date")
+
+    def _product_features(self, existing: pd.DataFrame, snapshots: pd.DataFrame) -> pd.DataFrame:
+        """Append per-product price/behaviour snapshots and recompute features for touched products"""
+        if snapshots.empty:
+            return existing
+        touched = set(snapshots["product_id"])
+        if not existing.empty:
+            keys = set(zip(snapshots["product_id"], snapshots["date"]))
+            keep = [(pid, d) not in keys for pid, d in zip(existing["product_id"], existing["date"])]
+            existing = existing[keep]
+            untouched = existing[~existing["product_id"].isin(touched)]
+            affected = pd.concat([existing[existing["product_id"].isin(touched)], snapshots], ignore_index=True)
+        else:
+            untouched = existing
+            affected = snapshots
+
+        affected = affected.sort_values(["product_id", "date"]).reset_index(drop=True)
+        affected["trend"] = affected.groupby("product_id").cumcount()
+        affected["rolling_mean"] = affected.groupby("product_id")["price"].transform(
+            lambda s: s.rolling(PRICE_ROLLING_WINDOW, min_periods=1).mean()
+        )
+        affected = _add_calendar_features(affected, "date")
+        return pd.concat([untouched, affected], ignore_index=True) if not untouched.empty else affected
+
+    async def refresh(self, force: bool = False) -> Dict:
+        """Incrementally pull new days from Mongo into the store"""
+        async with self._lock:
+            meta = model_store.load_json(META_KEY) or {}
+            if not force and meta.get("refreshedAt") and time.time() - meta["refreshedAt"] < FEATURE_STORE_MAX_AGE:
+                return meta
+
+            today = pd.Timestamp(datetime.now().date())
+            last_date = pd.Timestamp(meta["lastDate"]) if meta.get("lastDate") else None
+            days = (today - last_date).days + 1 if last_date is not None else FEATURE_STORE_HISTORY_DAYS
+            horizon_start = today - pd.Timedelta(days=FEATURE_STORE_HISTORY_DAYS)
+
+            new_sales = await self.data_collector.get_sales_data(days=days)
+            prices = await self.data_collector.get_price_history(days=days)
+            behavior = await self.data_collector.get_buyer_behavior_data(days=days)
+
+            # Parquet reads, merges and writes block, so keep them off the event loop
+            return await run_in_threadpool(
+                self._apply_refresh, new_sales, prices, behavior, last_date, today, horizon_start
+            )
+
+    def _apply_refresh(
+        self,
+        new_sales: pd.DataFrame,
+        prices: pd.DataFrame,
+        behavior: pd.DataFrame,
+        last_date: Optional[pd.Timestamp],
+        today: pd.Timestamp,
+        horizon_start: pd.Timestamp,
+    ) -> Dict:
+        """Merge freshly pulled rows into the stored tables and record the refresh"""
+        sales = self._read("sales")
+        if not new_sales.empty:
+            new_sales["date"] = pd.to_datetime(new_sales["date"])
+            if last_date is not None:
+                new_sales = new_sales[new_sales["date"] >= last_date]
+                if not sales.empty:
+                    sales = sales[sales["date"] < last_date]
+            sales = pd.concat([sales, new_sales], ignore_index=True) if not sales.empty else new_sales
+            sales = sales[sales["date"] >= horizon_start]
+            self._write("sales", sales)
+
+            for table, key in (("aggregate", None), ("category", "category"), ("county", "county")):
+                existing = self._read(table)
+                if not existing.empty:
+                    existing = existing[existing["date"] >= horizon_start]
+                self._write(table, self._grouped_features(existing, new_sales, key, last_date))
+
+        snapshots = self._product_snapshots(prices, behavior)
+        if not snapshots.empty:
+            existing = self._read("product")
+            if not existing.empty:
+                existing = existing[existing["date"] >= horizon_start]
+            self._write("product", self._product_features(existing, snapshots))
+
+        meta = {
+            "refreshedAt": time.time(),
+            "lastDate": today.isoformat(),
+            "rows": {table: len(self._read(table, columns=["date"])) for table in ("sales", "aggregate", "category", "county", "product")},
+        }
+        model_store.save_json(META_KEY, meta)
+        return meta
+
+    def _product_snapshots(self, prices: pd.DataFrame, behavior: pd.DataFrame) -> pd.DataFrame:
+        frames = []
+        for frame in (prices, behavior):
+            if frame.empty:
+                continue
+            frame = frame.dropna(subset=["date"]).copy()
+            frame["date"] = pd.to_datetime(frame["date"]).dt.normalize()
+            frames.append(frame.drop_duplicates(["product_id", "date"], keep="last"))
+        if not frames:
+            return pd.DataFrame()
+        snapshots = frames[0]
+        for frame in frames[1:]:
+            snapshots = snapshots.merge(frame, on=["product_id", "date"], how="outer")
+        for column in ("price", "views", "cart_additions"):
+            if column not in snapshots:
+                snapshots[column] = float("nan")
+        return snapshots[["date", "product_id", "price", "views", "cart_additions"]]
+
+    # Reads
+
+    async def _slice(self, table: str, days: int, columns: Optional[List[str]] = None, filters: Optional[List] = None) -> pd.DataFrame:
+        await self.refresh()
+        cutoff = pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=days)
+        return await run_in_threadpool(self._read, table, columns, [("date", ">=", cutoff)] + (filters or []))
+
+    async def sales_frame(self, days: int = 180) -> pd.DataFrame:
+        """Drop-in for DataCollector.get_sales_data"""
+        df = await self._slice("sales", days)
+        if not df.empty:
+            df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+        return df
+
+    async def aggregate_series(self, days: int = 180) -> pd.DataFrame:
+        """Daily total demand as the ds/y frame the forecasting engines expect"""
+        df = await self._slice("aggregate", days, columns=["date", "quantity"])
+        return pd.DataFrame({"ds": df["date"], "y": df["quantity"].astype(float)}) if not df.empty else df
+
+    async def category_features(self, days: int = 180, category: Optional[str] = None) -> pd.DataFrame:
+        return await self._slice("category", days, filters=[("category", "==", category)] if category else None)
+
+    async def county_features(self, days: int = 180, county: Optional[str] = None) -> pd.DataFrame:
+        return await self._slice("county", days, filters=[("county", "==", county)] if county else None)
+
+    async def product_features(self, product_id: str, days: int = 120) -> pd.DataFrame:
+        """Price/behaviour history with the price-model features already computed"""
+        return await self._slice("product", days, filters=[("product_id", "==", product_id)])
+
+    async def read_table(
+        self,
+        table: str,
+        columns: Optional[List[str]] = None,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """Projected, date-filtered read pushed down to the Parquet scan (used by exports)"""
+        await self.refresh()
+        filters = []
+        if start is not None:
+            filters.append(("date", ">=", start))
+        if end is not None:
+            filters.append(("date", "<=", end))
+        return await run_in_threadpool(self._read, table, columns, filters or None)
+
+
+feature_store = FeatureStore()
+
+
+async def _main(argv: List[str]) -> int:
+    from utils.database import connect_db, close_db
+
+    await connect_db()
+    try:
+        meta = await feature_store.refresh(force=True)
+    finally:
+        await close_db()
+    print(f"Feature store refreshed: {meta['rows']}")
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage: python -m services.feature_store
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
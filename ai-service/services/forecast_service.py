@@ -1,10 +1,32 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional
 from bson import ObjectId
 from services.data_collector import DataCollector
+from services import model_store
+from services.demand_counters import demand_counters, daily_forecasts
+from services.spike_detector import spike_detector
+from services.feature_store import feature_store, FEATURE_STORE_ENABLED, PRICE_FEATURES
+from services.model_manager import model_manager, series_version
+from services.training_budget import TrainingBudget
+from services.lstm_inference import NumpyLSTM
 from utils.database import get_database
+from utils.redis_client import get_redis_client
+from utils.training_lease import (
+    TrainingLease,
+    TRAINING_LEASE_COLD_WAIT,
+    TRAINING_LEASE_ENABLED,
+    TRAINING_LEASE_POLL_INTERVAL,
+    TRAINING_LEASE_WAIT,
+)
+from utils.stage_timer import StageTimer
+from utils.worker_pool import run_in_process
+import asyncio
+import importlib.util
+import json
+import os
+import time
 
 try:
     from prophet import Prophet
@@ -12,22 +34,80 @@ try:
 except Exception:
     PROPHET_AVAILABLE = False
 
-try:
-    import tensorflow as tf
-    from tensorflow.keras import layers, models
-    TENSORFLOW_AVAILABLE = True
-except Exception:
-    TENSORFLOW_AVAILABLE = False
+# TensorFlow is only imported when an LSTM has to be trained; serving runs
+# the exported NumPy model (services/lstm_inference.py)
+TENSORFLOW_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+# Serve LSTM forecasts from the NumPy export instead of Keras model.predict
+LSTM_COMPILED_INFERENCE = os.getenv("LSTM_COMPILED_INFERENCE", "true").lower() == "true"
 
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.cluster import KMeans
 
 FORECAST_HORIZON = {
+    "daily": 1,
     "weekly": 7,
     "monthly": 30,
     "seasonal": 90,
 }
 
+# Fit the longest horizon once per data version and serve shorter forecast
+# types as prefixes of that path. LSTM (recursive) and Prophet predictions for
+# the first n steps do not depend on how many steps are requested, so the
+# slices match what a dedicated fit for that horizon would return.
+FORECAST_SHARED_HORIZON = os.getenv("FORECAST_SHARED_HORIZON", "true").lower() == "true"
+FORECAST_PATH_TTL = int(os.getenv("FORECAST_PATH_TTL", 86400))
+FORECAST_PATH_PREFIX = "forecast_path:"
+
+# Training resolution per forecast type: "D" fits daily points, "W" fits
+# 7-day buckets and disaggregates the forecast back to daily values by the
+# weekday profile. Override with e.g. FORECAST_RESOLUTION="monthly=W,seasonal=W"
+RESOLUTIONS = ("D", "W")
+
+
+def _parse_resolutions(value: str) -> Dict[str, str]:
+    """Parse "type=D,type=W" overrides, failing at import on anything else"""
+    overrides = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        forecast_type, _, resolution = item.partition("=")
+        forecast_type, resolution = forecast_type.strip().lower(), resolution.strip().upper()
+        if forecast_type not in FORECAST_HORIZON or resolution not in RESOLUTIONS:
+            raise ValueError(
+                f"Invalid FORECAST_RESOLUTION entry {item!r}: expected <{'|'.join(FORECAST_HORIZON)}>=<D|W>"
+            )
+        overrides[forecast_type] = resolution
+    return overrides
+
+
+FORECAST_RESOLUTION = {"daily": "D", "weekly": "D", "monthly": "D", "seasonal": "W"}
+FORECAST_RESOLUTION.update(_parse_resolutions(os.getenv("FORECAST_RESOLUTION", "")))
+# Days of history loaded per resolution; weekly fits need a longer window
+# to have as many training points as the LSTM window requires
+FORECAST_HISTORY_DAYS = {
+    "D": int(os.getenv("FORECAST_HISTORY_DAYS", 180)),
+    "W": int(os.getenv("FORECAST_WEEKLY_HISTORY_DAYS", 364)),
+}
+
+
+def max_horizon(resolution: str) -> int:
+    """Longest horizon among the forecast types trained at this resolution"""
+    horizons = [h for t, h in FORECAST_HORIZON.items() if FORECAST_RESOLUTION.get(t, "D") == resolution]
+    return max(horizons or FORECAST_HORIZON.values())
+
+# Warm-start a Prophet refit from the stored parameters when at most this
+# many days have been appended since the previous fit
+PROPHET_WARM_START_MAX_NEW_DAYS = int(os.getenv("PROPHET_WARM_START_MAX_NEW_DAYS", 7))
+
+# "aggregate" fits one series and spreads it by category share,
+# "per_crop" fits one model per top category in the worker pool
+FORECAST_MODE = os.getenv("FORECAST_MODE", "aggregate")
+TOP_CATEGORIES = 7
+
+# When enabled, each forecast type uses the engine picked by the latest
+# backtest report (see services/backtesting.py) instead of always combining.
+# The report lives in Redis so every replica routes the same way.
+FORECAST_ENGINE_ROUTING = os.getenv("FORECAST_ENGINE_ROUTING", "false").lower() == "true"
+BACKTEST_REPORT_KEY = "backtest:report"
+
 
 class ForecastService:
     def __init__(self):
@@ -37,33 +117,260 @@ class ForecastService:
         self,
         forecast_type: str = "monthly",
         scope: str = "nationwide",
-        region: Optional[Dict] = None
+        region: Optional[Dict] = None,
+        mode: Optional[str] = None
     ) -> List[Dict]:
+        """Demand forecast as a stage graph.
+
+        Weather and sales (or the real-time counters for daily forecasts) load
+        concurrently, the series is built from the sales, and LSTM and Prophet
+        fit in parallel pool workers before the crop forecasts are assembled.
+        Each stage's wall time is recorded in utils.stage_timer.stage_stats.
+        """
         horizon = FORECAST_HORIZON.get(forecast_type, 30)
-        sales_df = await self.data_collector.get_sales_data(days=180)
-        weather_summary = await self.data_collector.get_weather_summary(region.get("county") if region else None)
+        mode = mode or FORECAST_MODE
+        resolution = FORECAST_RESOLUTION.get(forecast_type, "D")
+        history_days = FORECAST_HISTORY_DAYS[resolution]
+        county = region.get("county") if region else None
+        timer = StageTimer(f"forecast:{forecast_type}")
+        weather_stage = timer.run("weather", self.data_collector.get_weather_summary(county))
+
+        if forecast_type == "daily":
+            weather_summary, windows = await asyncio.gather(
+                weather_stage,
+                timer.run("realtime_counters", self._realtime_windows(county)),
+            )
+            realtime = self._realtime_daily_forecast(county, windows, weather_summary)
+            if realtime:
+                await timer.run("spikes", spike_detector.observe(realtime, forecast_type, mode="realtime"))
+                timer.finish()
+                return realtime
+            sales_df = await timer.run("sales", self._load_sales(days=history_days))
+        else:
+            weather_summary, sales_df = await asyncio.gather(
+                weather_stage,
+                timer.run("sales", self._load_sales(days=history_days)),
+            )
 
         if sales_df.empty or len(sales_df) < 10:
+            timer.finish()
             return self._fallback_forecast(forecast_type, region, weather_summary)
 
-        ts = self._prepare_time_series(sales_df)
-        lstm_values = self._forecast_with_lstm(ts, horizon)
-        prophet_values = self._forecast_with_prophet(ts, horizon, "D")
-        combined = self._combine_forecasts(ts, lstm_values, prophet_values, horizon)
+        ts = await timer.run("series", self._load_time_series(sales_df, days=history_days))
+        engine = await self._routed_engine(forecast_type)
+        crop_series = None
+        if mode == "per_crop":
+            crop_series = await timer.run(
+                "model_fits", self._forecast_per_crop(sales_df, horizon, engine, resolution)
+            )
+            combined = [sum(values) for values in zip(*crop_series.values())] if crop_series else []
+        else:
+            async def fit(steps):
+                return await self._fit_engines_parallel(ts, steps, "demand:aggregate", engine, resolution, timer)
 
-        return self._build_crop_forecasts(
-            sales_df,
-            combined,
-            weather_summary,
-            region
-        )
+            combined = await timer.run(
+                "model_fits", self._fit_horizons(ts, horizon, "demand:aggregate", engine, fit, resolution)
+            )
+
+        with timer.stage("build"):
+            forecasts = self._build_crop_forecasts(
+                sales_df,
+                combined,
+                weather_summary,
+                region,
+                crop_series=crop_series
+            )
+        # The random fallback above is never observed, only model output
+        await timer.run("spikes", spike_detector.observe(forecasts, forecast_type, mode))
+        timer.finish()
+        return forecasts
+
+    async def _realtime_windows(self, county: Optional[str]):
+        """Last 24h of order counters and the 24h before, or None if unavailable"""
+        try:
+            return await asyncio.gather(
+                demand_counters.get_window(county),
+                demand_counters.get_window(county, hours_ago=24),
+            )
+        except Exception as e:
+            print(f"Real-time demand counters unavailable: {e}")
+            return None
+
+    def _realtime_daily_forecast(self, county: Optional[str], windows, weather_summary: Dict) -> List[Dict]:
+        """Next-day demand from the last 24h of order counters, trended against the 24h before"""
+        if not windows or not windows[0]:
+            return []
+        current, previous = windows
+
+        forecasts = daily_forecasts(current, previous, county or "Nationwide", TOP_CATEGORIES)
+        for forecast in forecasts:
+            forecast["weather"] = weather_summary
+        return forecasts
+
+    async def _fit_engines_parallel(
+        self,
+        ts: pd.DataFrame,
+        horizon: int,
+        model_key: str,
+        engine: str,
+        resolution: str = "D",
+        timer: Optional[StageTimer] = None,
+    ) -> List[float]:
+        """Fit the selected engines in separate pool workers and combine them.
+
+        An engine that fails or exceeds its time budget is left out of the
+        combination (falling back to the baseline if none succeeds).
+        """
+        series, steps, series_key, freq = training_series(ts, horizon, model_key, resolution)
+        names = [name for name in ("lstm", "prophet") if engine in ("combined", name)]
+
+        async def fit_one(name):
+            job = run_in_process(fit_engine_forecast, series, steps, series_key, name, freq)
+            try:
+                return await (timer.run(name, job) if timer else job)
+            except asyncio.TimeoutError:
+                print(f"{name} fit for {model_key} exceeded its time budget")
+            except Exception as e:
+                print(f"{name} fit for {model_key} failed: {e}")
+            return None
+
+        results = dict(zip(names, await asyncio.gather(*(fit_one(name) for name in names))))
+        values = self._combine_forecasts(series, results.get("lstm"), results.get("prophet"), steps)
+        return finish_series([float(v) for v in values], ts, horizon, resolution)
+
+    async def _routed_engine(self, forecast_type: str) -> str:
+        """Engine chosen for a forecast type by the latest backtest, defaulting to combined"""
+        if not FORECAST_ENGINE_ROUTING:
+            return "combined"
+        report = await load_backtest_report() or {}
+        return report.get("routing", {}).get(forecast_type, "combined")
+
+    async def _forecast_per_crop(
+        self,
+        sales_df: pd.DataFrame,
+        horizon: int,
+        engine: str = "combined",
+        resolution: str = "D",
+    ) -> Dict[str, List[float]]:
+        """Fit one model per top category concurrently in the worker pool"""
+        categories = self._top_categories(sales_df).index.tolist()
+
+        async def fit(category):
+            ts = self._prepare_time_series(sales_df[sales_df["category"] == category])
+            model_key = f"demand:{category}"
+
+            async def fit_in_pool(steps):
+                return await self._fit_engines_parallel(ts, steps, model_key, engine, resolution)
+
+            try:
+                return await self._fit_horizons(ts, horizon, model_key, engine, fit_in_pool, resolution)
+            except asyncio.TimeoutError:
+                print(f"Per-crop fit for {category} exceeded its time budget, using baseline")
+            except Exception as e:
+                print(f"Per-crop fit for {category} failed, using baseline: {e}")
+            return self._combine_forecasts(ts, None, None, horizon)
+
+        results = await asyncio.gather(*(fit(category) for category in categories))
+        return dict(zip(categories, results))
+
+    async def _fit_horizons(
+        self,
+        ts: pd.DataFrame,
+        horizon: int,
+        model_key: str,
+        engine: str,
+        fit: Callable[[int], Awaitable[List[float]]],
+        resolution: str = "D",
+    ) -> List[float]:
+        """Serve a horizon as a slice of the longest-horizon path for this data version.
+
+        The path is kept in Redis keyed by model key, engine, resolution and
+        series version, so every forecast type trained at the same resolution
+        shares one fit across all replicas. A fenced training lease makes sure
+        only one replica fits a given series at a time.
+        """
+        longest = max_horizon(resolution)
+        if not FORECAST_SHARED_HORIZON or horizon > longest:
+            return await fit(horizon)
+
+        series_key = f"{model_key}:{engine}:{resolution}"
+        cache_key = f"{FORECAST_PATH_PREFIX}{series_key}:{series_version(ts)}"
+        latest_key = f"{FORECAST_PATH_PREFIX}{series_key}:latest"
+        try:
+            redis_client = await get_redis_client()
+            cached = await redis_client.get(cache_key)
+        except Exception as e:
+            print(f"Error reading forecast path {cache_key}: {e}")
+            return (await fit(longest))[:horizon]
+        if cached:
+            return json.loads(cached)[:horizon]
+
+        if not TRAINING_LEASE_ENABLED:
+            path = await fit(longest)
+            payload = json.dumps([float(v) for v in path])
+            try:
+                await redis_client.set(cache_key, payload, ex=FORECAST_PATH_TTL)
+                await redis_client.set(latest_key, payload, ex=FORECAST_PATH_TTL)
+            except Exception as e:
+                print(f"Error storing forecast path {cache_key}: {e}")
+            return path[:horizon]
+
+        # One replica trains each series while the others wait for its
+        # published path, then fall back to the previous one. With no previous
+        # path they keep waiting; a holder that dies stops renewing its lease,
+        # so a waiter acquires it on a later attempt and trains instead
+        lease = TrainingLease(series_key)
+        started = time.monotonic()
+        checked_previous = False
+        while True:
+            try:
+                acquired = await lease.acquire()
+            except Exception as e:
+                print(f"Training lease unavailable for {series_key}, fitting locally: {e}")
+                return (await fit(longest))[:horizon]
+
+            if acquired:
+                try:
+                    path = await fit(longest)
+                    payload = json.dumps([float(v) for v in path])
+                    try:
+                        await lease.publish({cache_key: payload, latest_key: payload}, FORECAST_PATH_TTL)
+                    except Exception as e:
+                        print(f"Error publishing forecast path {cache_key}: {e}")
+                finally:
+                    await lease.release()
+                return path[:horizon]
+
+            await asyncio.sleep(TRAINING_LEASE_POLL_INTERVAL)
+            try:
+                cached = await redis_client.get(cache_key)
+            except Exception as e:
+                print(f"Error polling forecast path {cache_key}, fitting locally: {e}")
+                return (await fit(longest))[:horizon]
+            if cached:
+                return json.loads(cached)[:horizon]
+
+            waited = time.monotonic() - started
+            if waited >= TRAINING_LEASE_WAIT and not checked_previous:
+                checked_previous = True
+                try:
+                    previous = await redis_client.get(latest_key)
+                except Exception as e:
+                    print(f"Error reading forecast path {latest_key}, fitting locally: {e}")
+                    return (await fit(longest))[:horizon]
+                if previous:
+                    print(f"Training of {series_key} still in progress elsewhere, serving the previous forecast path")
+                    return json.loads(previous)[:horizon]
+            if waited >= TRAINING_LEASE_COLD_WAIT:
+                print(f"Training of {series_key} elsewhere outlasted {TRAINING_LEASE_COLD_WAIT:.0f}s, fitting locally")
+                return (await fit(longest))[:horizon]
 
     async def generate_price_recommendations(
         self,
         product_id: str,
         historical_days: int = 60
     ) -> Dict:
-        history = await self.data_collector.get_price_history(product_id=product_id, days=historical_days)
+        history = await self._load_price_features(product_id, historical_days)
         if history.empty or len(history) < 5:
             avg_price = history["price"].mean() if not history.empty else None
             return {
@@ -72,20 +379,18 @@ class ForecastService:
                 "current_avg": round(avg_price, 2) if avg_price else None
             }
 
-        history["date"] = pd.to_datetime(history["date"])
-        history = history.sort_values("date")
-        history["dayofweek"] = history["date"].dt.dayofweek
-        history["month"] = history["date"].dt.month
-        history["trend"] = range(len(history))
-        history["rolling_mean"] = history["price"].rolling(window=5, min_periods=1).mean()
-
-        features = history[["dayofweek", "month", "trend", "rolling_mean"]].values
+        features = history[PRICE_FEATURES].values
         target = history["price"].values
 
-        model = RandomForestRegressor(n_estimators=150, random_state=42)
-        model.fit(features, target)
+        model_key = f"price:{product_id}"
+        version = series_version(history, column="price")
+        model = model_manager.get(model_key, version)
+        if model is None:
+            model = RandomForestRegressor(n_estimators=150, random_state=42)
+            model.fit(features, target)
+            model_manager.put(model_key, model, "sklearn", version)
 
-        future_features = np.array([[history.iloc[-1]["dayofweek"], history.iloc[-1]["month"], len(history) + 7, history.iloc[-1]["rolling_mean"]]])
+        future_features = np.array([[history.iloc[-1]["dayofweek"], history.iloc[-1]["month"], history.iloc[-1]["trend"] + 8, history.iloc[-1]["rolling_mean"]]])
         prediction = model.predict(future_features)[0]
 
         return {
@@ -113,7 +418,11 @@ class ForecastService:
             }
         return heatmap
 
-    async def get_farmer_insights(self, farmer_id: str) -> Dict:
+    async def get_farmer_insights(self, farmer_id: str, forecasts: Optional[List[Dict]] = None) -> Dict:
+        """Sales summary and relevant demand forecasts for a farmer.
+
+        Batch jobs pass precomputed forecasts so many farmers share one forecast run.
+        """
         db = get_database()
         if db is None:
             raise ValueError("Database connection is not initialized")
@@ -134,13 +443,15 @@ class ForecastService:
         total_orders = len(orders)
 
         crop_categories = list({p.get("category") for p in products if p.get("category")})
-        forecasts = await self.generate_demand_forecast()
+        if forecasts is None:
+            forecasts = await self.generate_demand_forecast()
         relevant_forecasts = [forecast for forecast in forecasts if forecast["crop"] in crop_categories]
 
         return {
             "total_sales": total_sales,
             "total_orders": total_orders,
             "active_products": len(products),
+            "crop_categories": crop_categories,
             "demand_forecasts": relevant_forecasts or forecasts[:5],
             "recommendations": [
                 "Increase supply for crops with demand scores above 80%",
@@ -282,6 +593,47 @@ class ForecastService:
 
     # Helper methods
 
+    async def _load_sales(self, days: int) -> pd.DataFrame:
+        """Sales frame from the feature store, falling back to the Mongo aggregation"""
+        if FEATURE_STORE_ENABLED:
+            try:
+                return await feature_store.sales_frame(days=days)
+            except Exception as e:
+                print(f"Feature store unavailable, querying Mongo: {e}")
+        return await self.data_collector.get_sales_data(days=days)
+
+    async def _load_time_series(self, sales_df: pd.DataFrame, days: int) -> pd.DataFrame:
+        if FEATURE_STORE_ENABLED:
+            try:
+                ts = await feature_store.aggregate_series(days=days)
+                if not ts.empty:
+                    return ts
+            except Exception as e:
+                print(f"Feature store unavailable, preparing series from sales: {e}")
+        return self._prepare_time_series(sales_df)
+
+    async def _load_price_features(self, product_id: str, days: int) -> pd.DataFrame:
+        """Price history with day-of-week, month, trend and rolling-mean features"""
+        if FEATURE_STORE_ENABLED:
+            try:
+                history = await feature_store.product_features(product_id, days=days)
+                history = history.dropna(subset=["price"])
+                if not history.empty:
+                    return history.sort_values("date").reset_index(drop=True)
+            except Exception as e:
+                print(f"Feature store unavailable, computing price features: {e}")
+
+        history = await self.data_collector.get_price_history(product_id=product_id, days=days)
+        if history.empty:
+            return history
+        history["date"] = pd.to_datetime(history["date"])
+        history = history.sort_values("date")
+        history["dayofweek"] = history["date"].dt.dayofweek
+        history["month"] = history["date"].dt.month
+        history["trend"] = range(len(history))
+        history["rolling_mean"] = history["price"].rolling(window=5, min_periods=1).mean()
+        return history
+
     def _prepare_time_series(self, sales_df: pd.DataFrame) -> pd.DataFrame:
         ts = (
             sales_df.groupby("date")["quantity"]
@@ -293,8 +645,19 @@ class ForecastService:
         ts["y"] = ts["quantity"].astype(float)
         return ts[["ds", "y"]]
 
-    def _forecast_with_lstm(self, ts: pd.DataFrame, horizon: int) -> Optional[List[float]]:
-        if not TENSORFLOW_AVAILABLE or len(ts) < 30:
+    def _forecast_with_lstm(
+        self,
+        ts: pd.DataFrame,
+        horizon: int,
+        model_key: Optional[str] = "demand:aggregate",
+        training: Optional[Dict] = None,
+    ) -> Optional[List[float]]:
+        """Fit (or reuse) the LSTM; model_key=None fits a throwaway model that is freed afterwards.
+
+        Fits are bounded by a TrainingBudget; when a fit happens its metadata
+        (epochs used, seconds, stop reason) is written into `training` if given.
+        """
+        if len(ts) < 30:
             return None
 
         values = ts["y"].values.astype(float)
@@ -303,14 +666,61 @@ class ForecastService:
             return None
 
         scaled = values / (np.max(values) or 1)
-        X, y = [], []
-        for i in range(len(scaled) - window):
-            X.append(scaled[i : i + window])
-            y.append(scaled[i + window])
+        manager_key = f"lstm:{model_key}"
+        version = series_version(ts)
+
+        compiled = self._compiled_lstm(manager_key, version) if model_key and LSTM_COMPILED_INFERENCE else None
+        model = None
+        if compiled is None:
+            if not TENSORFLOW_AVAILABLE:
+                return None
+            model = model_manager.get(manager_key, version) if model_key and not LSTM_COMPILED_INFERENCE else None
+            if model is None:
+                try:
+                    model, fit_metadata = self._train_lstm(scaled, window)
+                except ImportError as e:
+                    print(f"TensorFlow unavailable, skipping LSTM: {e}")
+                    return None
+                if training is not None:
+                    training.update(fit_metadata)
+                if model_key:
+                    model_store.save_json(f"training:{manager_key}", {"key": manager_key, "version": version, **fit_metadata})
+
+                if LSTM_COMPILED_INFERENCE:
+                    compiled = NumpyLSTM.from_keras(model)
+                    if model_key:
+                        model_manager.put(manager_key, compiled, "numpy", version, size_bytes=compiled.nbytes, metadata=fit_metadata)
+                        model_store.save_arrays(manager_key, {**compiled.to_arrays(), "version": np.array(version)})
+                    # Keras is only needed to train; serving uses the export
+                    model = None
+                    model_manager.discard("keras")
+                elif model_key:
+                    model_manager.put(manager_key, model, "keras", version, metadata=fit_metadata)
+
+        if compiled is not None:
+            predictions = compiled.forecast(scaled[-window:], horizon)
+        else:
+            predictions = []
+            last_seq = scaled[-window:].tolist()
+            for _ in range(horizon):
+                arr = np.array(last_seq[-window:]).reshape(1, window, 1)
+                next_val = model.predict(arr, verbose=0)[0][0]
+                predictions.append(float(next_val))
+                last_seq.append(next_val)
+            if not model_key:
+                model = None
+                model_manager.discard("keras")
+
+        max_value = np.max(values) or 1
+        return [max(0, pred * max_value) for pred in predictions]
 
-        X = np.array(X).reshape(-1, window, 1)
-        y = np.array(y)
+    def _train_lstm(self, scaled: np.ndarray, window: int):
+        """Build and fit the LSTM under the training budget; returns (model, fit metadata)"""
+        from tensorflow.keras import layers, models
 
+        # Strided view instead of copying each window in a Python loop
+        X = np.lib.stride_tricks.sliding_window_view(scaled[:-1], window).reshape(-1, window, 1)
+        y = scaled[window:]
         model = models.Sequential([
             layers.Input(shape=(window, 1)),
             layers.LSTM(32, return_sequences=False),
@@ -318,29 +728,90 @@ class ForecastService:
             layers.Dense(1),
         ])
         model.compile(optimizer="adam", loss="mse")
-        model.fit(X, y, epochs=40, batch_size=8, verbose=0)
-
-        predictions = []
-        last_seq = scaled[-window:].tolist()
-        for _ in range(horizon):
-            arr = np.array(last_seq[-window:]).reshape(1, window, 1)
-            next_val = model.predict(arr, verbose=0)[0][0]
-            predictions.append(float(next_val))
-            last_seq.append(next_val)
-
-        max_value = np.max(values) or 1
-        return [max(0, pred * max_value) for pred in predictions]
+        return model, TrainingBudget().fit(model, X, y)
+
+    def _compiled_lstm(self, manager_key: str, version: str) -> Optional[NumpyLSTM]:
+        """Exported LSTM for this data version from memory, else from the model store"""
+        compiled = model_manager.get(manager_key, version)
+        if isinstance(compiled, NumpyLSTM):
+            return compiled
+        arrays = model_store.load_arrays(manager_key)
+        if arrays is None or str(arrays.get("version")) != version:
+            return None
+        compiled = NumpyLSTM.from_arrays(arrays)
+        model_manager.put(manager_key, compiled, "numpy", version, size_bytes=compiled.nbytes)
+        return compiled
 
-    def _forecast_with_prophet(self, ts: pd.DataFrame, horizon: int, freq: str) -> Optional[List[float]]:
+    def _forecast_with_prophet(
+        self,
+        ts: pd.DataFrame,
+        horizon: int,
+        freq: str,
+        model_key: Optional[str] = "demand:aggregate",
+    ) -> Optional[List[float]]:
+        """Fit Prophet; model_key=None skips warm start and parameter persistence"""
         if not PROPHET_AVAILABLE or len(ts) < 10:
             return None
 
+        store_key = f"prophet:{model_key}:{freq}"
+        version = series_version(ts)
+        model = model_manager.get(store_key, version) if model_key else None
+        if model is not None:
+            future = model.make_future_dataframe(periods=horizon, freq=freq)
+            return model.predict(future).tail(horizon)["yhat"].tolist()
+
+        init = self._prophet_warm_start(store_key, ts) if model_key else None
         model = Prophet(seasonality_mode="multiplicative", yearly_seasonality=False)
-        model.fit(ts)
+        if init:
+            try:
+                model.fit(ts, init=init)
+            except Exception as e:
+                # Parameter shapes can drift (e.g. changepoint count); refit cold
+                print(f"Prophet warm start failed for {model_key}, refitting cold: {e}")
+                model = Prophet(seasonality_mode="multiplicative", yearly_seasonality=False)
+                model.fit(ts)
+        else:
+            model.fit(ts)
+
+        if model_key:
+            try:
+                model_store.save_json(store_key, {
+                    "last_ds": ts["ds"].max().isoformat(),
+                    "n_obs": len(ts),
+                    "params": self._prophet_params(model),
+                })
+            except Exception as e:
+                print(f"Error persisting Prophet parameters for {model_key}: {e}")
+            model_manager.put(store_key, model, "prophet", version)
+
         future = model.make_future_dataframe(periods=horizon, freq=freq)
         forecast = model.predict(future)
         return forecast.tail(horizon)["yhat"].tolist()
 
+    def _prophet_params(self, model) -> Dict:
+        """Extract fitted Stan parameters in the shape Prophet.fit(init=...) expects"""
+        params = {}
+        for name in ["k", "m", "sigma_obs"]:
+            params[name] = float(model.params[name][0][0])
+        for name in ["delta", "beta"]:
+            params[name] = [float(v) for v in model.params[name][0]]
+        return params
+
+    def _prophet_warm_start(self, store_key: str, ts: pd.DataFrame) -> Optional[Dict]:
+        """Return stored parameters if the series only grew by a few days since the last fit"""
+        stored = model_store.load_json(store_key)
+        if not stored or "params" not in stored:
+            return None
+
+        new_days = (ts["ds"].max() - pd.Timestamp(stored["last_ds"])).days
+        if new_days < 0 or new_days > PROPHET_WARM_START_MAX_NEW_DAYS:
+            return None
+
+        params = dict(stored["params"])
+        params["delta"] = np.array(params["delta"])
+        params["beta"] = np.array(params["beta"])
+        return params
+
     def _combine_forecasts(
         self,
         ts: pd.DataFrame,
@@ -364,10 +835,10 @@ class ForecastService:
         combined_series: List[float],
         weather_summary: Dict,
         region: Optional[Dict],
+        crop_series: Optional[Dict[str, List[float]]] = None,
     ) -> List[Dict]:
         total_quantity = sales_df["quantity"].sum() or 1
-        category_totals = sales_df.groupby("category")["quantity"].sum().sort_values(ascending=False)
-        top_categories = category_totals.head(7)
+        top_categories = self._top_categories(sales_df)
 
         weather_factor = 1.0
         if weather_summary["avg_temp"] > 28:
@@ -377,8 +848,11 @@ class ForecastService:
 
         forecasts = []
         for category, qty in top_categories.items():
-            share = qty / total_quantity
-            base_demand = np.mean(combined_series) * share * weather_factor
+            if crop_series and category in crop_series:
+                base_demand = np.mean(crop_series[category]) * weather_factor
+            else:
+                share = qty / total_quantity
+                base_demand = np.mean(combined_series) * share * weather_factor
             demand_score = min(100, max(30, base_demand))
             avg_price = sales_df[sales_df["category"] == category]["avg_price"].mean() or 0
             confidence = 75
@@ -398,6 +872,10 @@ class ForecastService:
 
         return forecasts
 
+    def _top_categories(self, sales_df: pd.DataFrame) -> pd.Series:
+        category_totals = sales_df.groupby("category")["quantity"].sum().sort_values(ascending=False)
+        return category_totals.head(TOP_CATEGORIES)
+
     def _fallback_forecast(self, forecast_type: str, region: Optional[Dict], weather_summary: Dict) -> List[Dict]:
         seasonal_factor = 1.2 if forecast_type == "seasonal" else 1.0
         crops = ["Maize", "Beans", "Tomatoes", "Onions", "Potatoes", "Cabbage", "Carrots"]
@@ -415,3 +893,87 @@ class ForecastService:
             })
         return forecasts
 
+
+
+async def load_backtest_report() -> Optional[Dict]:
+    """Latest backtest report shared by all replicas, or None"""
+    try:
+        redis_client = await get_redis_client()
+        report = await redis_client.get(BACKTEST_REPORT_KEY)
+    except Exception as e:
+        print(f"Error reading backtest report: {e}")
+        return None
+    return json.loads(report) if report else None
+
+
+async def invalidate_forecast_paths() -> None:
+    """Drop shared forecast paths so the next request refits every horizon"""
+    redis_client = await get_redis_client()
+    async for key in redis_client.scan_iter(match=f"{FORECAST_PATH_PREFIX}*"):
+        await redis_client.delete(key)
+
+
+def resample_weekly(ts: pd.DataFrame) -> pd.DataFrame:
+    """Sum a daily ds/y series into complete 7-day buckets ending on its last day"""
+    daily = ts.groupby(pd.to_datetime(ts["ds"]).dt.normalize())["y"].sum()
+    if daily.empty:
+        return pd.DataFrame({"ds": pd.Series(dtype="datetime64[ns]"), "y": pd.Series(dtype=float)})
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D"), fill_value=0.0)
+    # Missing days are zero-demand days, so each bucket holds exactly 7 days
+    bucket = (daily.index.max() - daily.index).days // 7
+    counts = pd.Series(1, index=daily.index).groupby(bucket).sum()
+    sums = daily.groupby(bucket).sum()[counts == 7]
+    ends = daily.index.max() - pd.to_timedelta(sums.index * 7, unit="D")
+    return pd.DataFrame({"ds": ends, "y": sums.values.astype(float)}).sort_values("ds").reset_index(drop=True)
+
+
+def weekday_profile(ts: pd.DataFrame) -> np.ndarray:
+    """Share of weekly demand falling on each weekday (Monday first), summing to 1"""
+    dates = pd.to_datetime(ts["ds"])
+    totals = ts["y"].groupby(dates.dt.dayofweek).sum().reindex(range(7), fill_value=0.0).values.astype(float)
+    total = totals.sum()
+    return totals / total if total > 0 else np.full(7, 1 / 7)
+
+
+def disaggregate_weekly(weekly_values: List[float], last_date, horizon: int, profile: np.ndarray) -> List[float]:
+    """Spread weekly totals over the following days by weekday profile.
+
+    Week i covers the 7 days after last_date + 7*i, so each week contains every
+    weekday exactly once and its daily values sum back to the weekly total.
+    """
+    days = pd.date_range(pd.Timestamp(last_date).normalize() + pd.Timedelta(days=1), periods=horizon, freq="D")
+    return [float(weekly_values[i // 7] * profile[day.dayofweek]) for i, day in enumerate(days)]
+
+
+def training_series(ts: pd.DataFrame, horizon: int, model_key: str, resolution: str = "D"):
+    """Series, step count, model key and Prophet freq to train on at a resolution.
+
+    With resolution "W" the models train on weekly buckets (about 7x fewer
+    points) for ceil(horizon / 7) steps; finish_series maps the result back.
+    """
+    if resolution == "W":
+        return resample_weekly(ts), -(-horizon // 7), f"{model_key}:weekly" if model_key else None, "7D"
+    return ts, horizon, model_key, "D"
+
+
+def finish_series(values: List[float], ts: pd.DataFrame, horizon: int, resolution: str = "D") -> List[float]:
+    """Daily forecast of `horizon` values from values at the training resolution"""
+    if resolution == "W":
+        return disaggregate_weekly(values, pd.to_datetime(ts["ds"]).max(), horizon, weekday_profile(ts))
+    return values[:horizon]
+
+
+def fit_engine_forecast(
+    series: pd.DataFrame,
+    steps: int,
+    model_key: str,
+    engine: str,
+    freq: str = "D",
+) -> Optional[List[float]]:
+    """Fit one engine ("lstm" or "prophet") on a series (picklable for pool workers)"""
+    service = ForecastService()
+    if engine == "lstm":
+        values = service._forecast_with_lstm(series, steps, model_key=model_key)
+    else:
+        values = service._forecast_with_prophet(series, steps, freq, model_key=model_key)
+    return [float(v) for v in values] if values else None
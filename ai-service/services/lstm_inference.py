@@ -0,0 +1,256 @@
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+# Parity tolerance between the Keras model and the NumPy export (float32 math)
+PARITY_TOLERANCE = 1e-4
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x: np.ndarray) -> np.ndarray:
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+}
+
+
+class NumpyLSTM:
+    """Pure-NumPy inference for the forecasting LSTM (LSTM -> Dense stack).
+
+    Holds the exported weights only, so serving needs neither TensorFlow nor a
+    Keras session: one prediction is a few small matrix products instead of a
+    model.predict call with its fixed graph-dispatch overhead.
+    """
+
+    def __init__(
+        self,
+        kernel: np.ndarray,
+        recurrent_kernel: np.ndarray,
+        bias: np.ndarray,
+        dense: List[Dict],
+        activation: str = "tanh",
+        recurrent_activation: str = "sigmoid",
+    ):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrent_kernel = np.asarray(recurrent_kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.dense = [
+            {
+                "kernel": np.asarray(layer["kernel"], dtype=np.float32),
+                "bias": np.asarray(layer["bias"], dtype=np.float32),
+                "activation": layer["activation"],
+            }
+            for layer in dense
+        ]
+        self.activation = activation
+        self.recurrent_activation = recurrent_activation
+        self.units = self.recurrent_kernel.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.kernel, self.recurrent_kernel, self.bias]
+        arrays += [a for layer in self.dense for a in (layer["kernel"], layer["bias"])]
+        return int(sum(a.nbytes for a in arrays))
+
+    @classmethod
+    def from_keras(cls, model) -> "NumpyLSTM":
+        """Export the weights of a Sequential LSTM -> Dense... model"""
+        lstm = None
+        dense = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            if kind == "LSTM":
+                if lstm is not None or config.get("return_sequences"):
+                    raise ValueError("Only a single LSTM layer returning its last state is supported")
+                kernel, recurrent_kernel, bias = layer.get_weights()
+                lstm = {
+                    "kernel": kernel,
+                    "recurrent_kernel": recurrent_kernel,
+                    "bias": bias,
+                    "activation": config.get("activation", "tanh"),
+                    "recurrent_activation": config.get("recurrent_activation", "sigmoid"),
+                }
+            elif kind == "Dense":
+                kernel, bias = layer.get_weights()
+                dense.append({"kernel": kernel, "bias": bias, "activation": config.get("activation", "linear")})
+            elif kind not in ("InputLayer", "Dropout"):
+                raise ValueError(f"Unsupported layer for NumPy export: {kind}")
+        if lstm is None:
+            raise ValueError("Model has no LSTM layer")
+        return cls(
+            lstm["kernel"],
+            lstm["recurrent_kernel"],
+            lstm["bias"],
+            dense,
+            activation=lstm["activation"],
+            recurrent_activation=lstm["recurrent_activation"],
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {
+            "kernel": self.kernel,
+            "recurrent_kernel": self.recurrent_kernel,
+            "bias": self.bias,
+            "activations": np.array([self.activation, self.recurrent_activation]),
+            "dense_activations": np.array([layer["activation"] for layer in self.dense]),
+        }
+        for i, layer in enumerate(self.dense):
+            arrays[f"dense_{i}_kernel"] = layer["kernel"]
+            arrays[f"dense_{i}_bias"] = layer["bias"]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "NumpyLSTM":
+        activation, recurrent_activation = [str(a) for a in arrays["activations"]]
+        dense = [
+            {
+                "kernel": arrays[f"dense_{i}_kernel"],
+                "bias": arrays[f"dense_{i}_bias"],
+                "activation": str(name),
+            }
+            for i, name in enumerate(arrays["dense_activations"])
+        ]
+        return cls(
+            arrays["kernel"],
+            arrays["recurrent_kernel"],
+            arrays["bias"],
+            dense,
+            activation=activation,
+            recurrent_activation=recurrent_activation,
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Batch prediction for inputs shaped (samples, timesteps, features)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 2:
+            X = X[..., np.newaxis]
+        act = ACTIVATIONS[self.activation]
+        recurrent_act = ACTIVATIONS[self.recurrent_activation]
+        units = self.units
+
+        # Input projections for every timestep at once; only the recurrent
+        # part has to run step by step
+        projected = X @ self.kernel + self.bias
+        h = np.zeros((X.shape[0], units), dtype=np.float32)
+        c = np.zeros((X.shape[0], units), dtype=np.float32)
+        for t in range(X.shape[1]):
+            z = projected[:, t, :] + h @ self.recurrent_kernel
+            # Keras gate order: input, forget, cell candidate, output
+            i = recurrent_act(z[:, :units])
+            f = recurrent_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = recurrent_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+
+        out = h
+        for layer in self.dense:
+            out = ACTIVATIONS[layer["activation"]](out @ layer["kernel"] + layer["bias"])
+        return out
+
+    def forecast(self, last_sequence: np.ndarray, horizon: int) -> List[float]:
+        """Recursive multi-step forecast, feeding each prediction back as the next input"""
+        sequence = list(np.asarray(last_sequence, dtype=np.float32))
+        window = len(sequence)
+        predictions = []
+        for _ in range(horizon):
+            next_value = float(self.predict(np.array(sequence[-window:]).reshape(1, window, 1))[0, 0])
+            predictions.append(next_value)
+            sequence.append(next_value)
+        return predictions
+
+
+def check_parity(window: int = 14, horizon: int = 90, repeats: int = 3, seed: int = 42) -> Dict:
+    """Fit a small LSTM on a synthetic series and compare the Keras and NumPy paths.
+
+    Returns the max absolute difference on a batch and on the recursive
+    forecast, plus the latency of both forecast loops.
+    """
+    from tensorflow.keras import layers, models
+
+    rng = np.random.default_rng(seed)
+    days = np.arange(180)
+    series = 50 + 10 * np.sin(2 * np.pi * days / 7) + rng.normal(0, 2, len(days))
+    scaled = series / series.max()
+    X = np.lib.stride_tricks.sliding_window_view(scaled[:-1], window).reshape(-1, window, 1)
+    y = scaled[window:]
+
+    model = models.Sequential([
+        layers.Input(shape=(window, 1)),
+        layers.LSTM(32, return_sequences=False),
+        layers.Dense(16, activation="relu"),
+        layers.Dense(1),
+    ])
+    model.compile(optimizer="adam", loss="mse")
+    model.fit(X, y, epochs=3, batch_size=16, verbose=0)
+    compiled = NumpyLSTM.from_keras(model)
+
+    batch_diff = float(np.max(np.abs(model.predict(X, verbose=0) - compiled.predict(X))))
+
+    def keras_forecast():
+        sequence = scaled[-window:].tolist()
+        predictions = []
+        for _ in range(horizon):
+            value = float(model.predict(np.array(sequence[-window:]).reshape(1, window, 1), verbose=0)[0][0])
+            predictions.append(value)
+            sequence.append(value)
+        return predictions
+
+    def timed(func):
+        best = float("inf")
+        result = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return result, best
+
+    keras_values, keras_seconds = timed(keras_forecast)
+    numpy_values, numpy_seconds = timed(lambda: compiled.forecast(scaled[-window:], horizon))
+    forecast_diff = float(np.max(np.abs(np.array(keras_values) - np.array(numpy_values))))
+
+    return {
+        "batch_max_abs_diff": batch_diff,
+        "forecast_max_abs_diff": forecast_diff,
+        "tolerance": PARITY_TOLERANCE,
+        "passed": batch_diff <= PARITY_TOLERANCE and forecast_diff <= PARITY_TOLERANCE * horizon,
+        "horizon": horizon,
+        "keras_seconds": round(keras_seconds, 4),
+        "numpy_seconds": round(numpy_seconds, 4),
+        "speedup": round(keras_seconds / numpy_seconds, 1) if numpy_seconds else None,
+        "weights_bytes": compiled.nbytes,
+    }
+
+
+def _main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Check Keras vs NumPy LSTM inference parity and latency")
+    parser.add_argument("--horizon", type=int, default=90)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    try:
+        result = check_parity(horizon=args.horizon, repeats=args.repeats)
+    except ImportError:
+        print("The parity check requires TensorFlow. Install with: pip install -r requirements-ml.txt")
+        return 1
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    # Usage: python -m services.lstm_inference [--horizon 90] [--repeats 3]
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,198 @@
+import gc
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.worker_pool import FORECAST_MAX_WORKERS, register_worker_hooks
+
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", 512))
+# Each pool worker fitting demand models keeps its own cache; by default the
+# workers split the budget so together they stay within MODEL_MEMORY_BUDGET_MB
+MODEL_WORKER_MEMORY_BUDGET_MB = float(
+    os.getenv("MODEL_WORKER_MEMORY_BUDGET_MB") or MODEL_MEMORY_BUDGET_MB / max(1, FORECAST_MAX_WORKERS)
+)
+
+# Keras models carry graph/function state well beyond their weights; this
+# is added to the weight bytes so the budget reflects real residency
+KERAS_OVERHEAD_BYTES = 2 * 1024 * 1024
+
+
+def series_version(ts: pd.DataFrame, column: str = "y") -> str:
+    """Content hash identifying the data a model was fitted on"""
+    digest = hashlib.sha1(np.ascontiguousarray(ts[column].values, dtype=float).tobytes())
+    if "ds" in ts and len(ts):
+        digest.update(str(ts["ds"].iloc[-1]).encode())
+    return digest.hexdigest()[:16]
+
+
+def estimate_model_bytes(model: Any, kind: str) -> int:
+    """Rough resident size of a fitted model"""
+    try:
+        if kind == "keras":
+            return int(sum(w.nbytes for w in model.get_weights())) + KERAS_OVERHEAD_BYTES
+        if kind == "prophet":
+            size = int(model.history.memory_usage(deep=True).sum()) if model.history is not None else 0
+            return size + int(sum(np.asarray(v).nbytes for v in model.params.values()))
+        if kind == "sklearn" and hasattr(model, "estimators_"):
+            size = 0
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                size += tree.node_count * 64 + tree.value.nbytes
+            return size
+    except Exception:
+        pass
+    return 1024 * 1024
+
+
+class ModelManager:
+    """Keeps fitted forecasting and pricing models resident under a memory budget.
+
+    Entries are keyed by model key and tagged with the version of the data they
+    were fitted on; a lookup with a different version misses and the stale model
+    is released. The least recently used models are evicted once the budget is
+    exceeded, and evicted Keras models release their backend state.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._models: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self._models.values())
+
+    def get(self, key: str, version: Optional[str] = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None or (version is not None and entry["version"] != version):
+                self.misses += 1
+                if entry is not None:
+                    self._release(key)
+                return None
+            self._models.move_to_end(key)
+            entry["last_used"] = time.time()
+            entry["hits"] += 1
+            self.hits += 1
+            return entry["model"]
+
+    def put(
+        self,
+        key: str,
+        model: Any,
+        kind: str,
+        version: Optional[str] = None,
+        size_bytes: Optional[int] = None,
+        metadata: Optional[Dict] = None,
+    ) -> None:
+        size = size_bytes if size_bytes is not None else estimate_model_bytes(model, kind)
+        with self._lock:
+            if key in self._models:
+                self._release(key)
+            if size > self.budget_bytes:
+                # Larger than the whole budget: the caller uses it once, it isn't kept
+                return
+            self._models[key] = {
+                "model": model,
+                "kind": kind,
+                "version": version,
+                "bytes": size,
+                "loaded_at": time.time(),
+                "last_used": time.time(),
+                "hits": 0,
+                "metadata": metadata or {},
+            }
+            while self.used_bytes > self.budget_bytes and len(self._models) > 1:
+                oldest = next(iter(self._models))
+                self._release(oldest)
+                self.evictions += 1
+
+    def evict(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._models:
+                return False
+            self._release(key)
+            self.evictions += 1
+            return True
+
+    def discard(self, kind: str) -> None:
+        """Reclaim a used-once, never registered model once the caller has dropped its reference"""
+        with self._lock:
+            self._free(kind)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._models):
+                self._release(key)
+
+    def _release(self, key: str) -> None:
+        # Drop the cache's reference before collecting, so the model is freed
+        kind = self._models.pop(key)["kind"]
+        self._free(kind)
+
+    def _free(self, kind: str) -> None:
+        if kind == "keras" and not any(entry["kind"] == "keras" for entry in self._models.values()):
+            # clear_session drops Keras' global graph state, so only do it
+            # once no other Keras model is still resident
+            try:
+                import tensorflow as tf
+                tf.keras.backend.clear_session()
+            except Exception:
+                pass
+        gc.collect()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "used_bytes": self.used_bytes,
+                "resident": len(self._models),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "process_rss_bytes": _process_rss_bytes(),
+                "models": [
+                    {
+                        "key": key,
+                        "kind": entry["kind"],
+                        "version": entry["version"],
+                        "bytes": entry["bytes"],
+                        "hits": entry["hits"],
+                        "loaded_at": entry["loaded_at"],
+                        "last_used": entry["last_used"],
+                        "metadata": entry["metadata"],
+                    }
+                    for key, entry in reversed(self._models.items())
+                ],
+            }
+
+
+def _process_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+model_manager = ModelManager(int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024))
+
+
+def _configure_pool_worker() -> None:
+    model_manager.budget_bytes = int(MODEL_WORKER_MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+def _pool_worker_models() -> Dict:
+    return {"models": model_manager.stats()}
+
+
+register_worker_hooks(initializer=_configure_pool_worker, status=_pool_worker_models)
@@ -0,0 +1,94 @@
+import json
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MODEL_STORE_DIR = os.getenv(
+    "MODEL_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".model_store")
+)
+
+
+def _path_for(key: str, extension: str = ".json") -> str:
+    """Map a model key such as 'prophet:demand:Maize' to a file in the store"""
+    safe_key = re.sub(r"[^A-Za-z0-9_.-]+", "_", key)
+    return os.path.join(MODEL_STORE_DIR, safe_key + extension)
+
+
+def save_json(key: str, data: Dict) -> None:
+    """Persist a JSON document atomically so readers never see a partial file"""
+    os.makedirs(MODEL_STORE_DIR, exist_ok=True)
+    path = _path_for(key)
+    fd, tmp_path = tempfile.mkstemp(dir=MODEL_STORE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_json(key: str) -> Optional[Dict]:
+    """Load a stored JSON document, or None if it is missing or unreadable"""
+    path = _path_for(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading model store entry {key}: {e}")
+        return None
+
+
+def save_arrays(key: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Persist named NumPy arrays (e.g. exported model weights) atomically as .npz"""
+    os.makedirs(MODEL_STORE_DIR, exist_ok=True)
+    path = _path_for(key, extension=".npz")
+    fd, tmp_path = tempfile.mkstemp(dir=MODEL_STORE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_arrays(key: str) -> Optional[Dict[str, np.ndarray]]:
+    """Load stored arrays, or None if they are missing or unreadable"""
+    path = _path_for(key, extension=".npz")
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+    except Exception as e:
+        print(f"Error loading model store arrays {key}: {e}")
+        return None
+
+
+def load_prefix(prefix: str) -> List[Dict]:
+    """Load every stored JSON document whose key starts with prefix"""
+    if not os.path.isdir(MODEL_STORE_DIR):
+        return []
+    safe_prefix = os.path.basename(_path_for(prefix, extension=""))
+    documents = []
+    for filename in sorted(os.listdir(MODEL_STORE_DIR)):
+        if filename.startswith(safe_prefix) and filename.endswith(".json"):
+            document = load_json(filename[:-len(".json")])
+            if document is not None:
+                documents.append(document)
+    return documents
+
+
+def delete(key: str) -> None:
+    path = _path_for(key)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from services.forecast_service import ForecastService
+from services.report_renderer import render_forecast_csv, render_forecast_pdf
+from utils.database import get_database
+from utils.worker_pool import run_in_process
+
+REPORTS_DIR = os.getenv(
+    "REPORTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".reports")
+)
+REPORT_BATCH_FORECAST_TYPE = os.getenv("REPORT_BATCH_FORECAST_TYPE", "monthly")
+# Concurrent per-farmer insight lookups against Mongo
+REPORT_BATCH_DB_CONCURRENCY = int(os.getenv("REPORT_BATCH_DB_CONCURRENCY", 8))
+REPORT_BATCH_RETENTION_DAYS = int(os.getenv("REPORT_BATCH_RETENTION_DAYS", 7))
+
+REPORT_FORMATS = ("pdf", "csv")
+
+_BATCH_ID = re.compile(r"^[0-9a-f]{12}$")
+
+
+def batch_dir(batch_id: str) -> str:
+    if not _BATCH_ID.match(batch_id):
+        raise ValueError("Invalid batch ID")
+    return os.path.join(REPORTS_DIR, batch_id)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def render_farmer_report(
+    fmt: str,
+    forecasts: List[Dict],
+    forecast_type: str,
+    region: Optional[Dict],
+    farmer_name: str,
+    insights: Dict,
+) -> bytes:
+    """Render one farmer's report; module-level so it can run in the process pool"""
+    if fmt == "csv":
+        return render_forecast_csv(forecasts, forecast_type, region)
+    summary = [
+        ['Farmer:', farmer_name],
+        ['Total Sales (KES):', f"{insights.get('total_sales', 0):,.2f}"],
+        ['Total Orders:', str(insights.get('total_orders', 0))],
+        ['Active Products:', str(insights.get('active_products', 0))],
+    ]
+    return render_forecast_pdf(
+        forecasts,
+        forecast_type,
+        "county" if region else "nationwide",
+        region,
+        title="AgroMarketHub Farmer Forecast Report",
+        summary=summary,
+    )
+
+
+def farmer_display_name(farmer: Dict) -> str:
+    return " ".join(filter(None, [farmer.get("firstName"), farmer.get("lastName")])) or str(farmer["_id"])
+
+
+class ReportBatchGenerator:
+    """Generates forecast reports for many farmers in one run.
+
+    Forecasts are computed once nationwide and once per distinct farmer county,
+    every farmer's report is built from those shared results, and rendering is
+    fanned out across the process pool. Outputs are written under
+    REPORTS_DIR/<batch_id>/ with a manifest listing each farmer's files and
+    email address, so the backend can download and mail them.
+    """
+
+    def __init__(self):
+        self.forecast_service = ForecastService()
+
+    async def _resolve_farmers(self, farmer_ids: Optional[List[str]]) -> List[Dict]:
+        db = get_database()
+        if db is None:
+            raise ValueError("Database connection is not initialized")
+
+        if farmer_ids:
+            try:
+                object_ids = [ObjectId(farmer_id) for farmer_id in farmer_ids]
+            except Exception as exc:
+                raise ValueError("Invalid farmer ID") from exc
+        else:
+            object_ids = await db.subscriptions.distinct("farmer", {"status": "active"})
+
+        if not object_ids:
+            return []
+        return await db.users.find(
+            {"_id": {"$in": object_ids}},
+            {"firstName": 1, "lastName": 1, "email": 1, "farmLocation": 1},
+        ).to_list(length=None)
+
+    async def farmer_name(self, farmer_id: str) -> str:
+        """Display name for one farmer's report, falling back to the id"""
+        farmers = await self._resolve_farmers([farmer_id])
+        return farmer_display_name(farmers[0]) if farmers else farmer_id
+
+    async def _shared_forecasts(self, counties: List[str], forecast_type: str) -> Dict[Optional[str], List[Dict]]:
+        """One forecast run per distinct county plus the nationwide run (key None)"""
+        regions = [None] + counties
+        results = await asyncio.gather(*[
+            self.forecast_service.generate_demand_forecast(
+                forecast_type=forecast_type,
+                scope="county" if county else "nationwide",
+                region={"county": county} if county else None,
+            )
+            for county in regions
+        ])
+        return dict(zip(regions, results))
+
+    async def generate(
+        self,
+        farmer_ids: Optional[List[str]] = None,
+        formats: Optional[List[str]] = None,
+        forecast_type: str = REPORT_BATCH_FORECAST_TYPE,
+    ) -> Dict:
+        formats = formats or ["pdf"]
+        for fmt in formats:
+            if fmt not in REPORT_FORMATS:
+                raise ValueError(f"Invalid report format: {fmt}")
+
+        started = time.perf_counter()
+        batch_id = uuid.uuid4().hex[:12]
+        directory = batch_dir(batch_id)
+        os.makedirs(directory, exist_ok=True)
+
+        farmers = await self._resolve_farmers(farmer_ids)
+        counties = sorted({
+            (farmer.get("farmLocation") or {}).get("county")
+            for farmer in farmers
+            if (farmer.get("farmLocation") or {}).get("county")
+        })
+        shared = await self._shared_forecasts(counties, forecast_type)
+        forecast_seconds = time.perf_counter() - started
+
+        semaphore = asyncio.Semaphore(REPORT_BATCH_DB_CONCURRENCY)
+
+        async def insights_for(farmer: Dict) -> Dict:
+            async with semaphore:
+                return await self.forecast_service.get_farmer_insights(str(farmer["_id"]), forecasts=shared[None])
+
+        insights = await asyncio.gather(*[insights_for(farmer) for farmer in farmers], return_exceptions=True)
+
+        jobs = []
+        entries = []
+        for farmer, farmer_insights in zip(farmers, insights):
+            farmer_id = str(farmer["_id"])
+            name = farmer_display_name(farmer)
+            entry = {"farmerId": farmer_id, "name": name, "email": farmer.get("email"), "files": {}}
+            entries.append(entry)
+            if isinstance(farmer_insights, Exception):
+                entry["error"] = str(farmer_insights)
+                continue
+
+            county = (farmer.get("farmLocation") or {}).get("county")
+            region = {"county": county} if county else None
+            crops = set(farmer_insights.get("crop_categories", []))
+            regional = shared.get(county) if county else shared[None]
+            forecasts = [f for f in regional if f["crop"] in crops] or regional[:5]
+            entry["region"] = county or "Nationwide"
+            for fmt in formats:
+                jobs.append((entry, fmt, run_in_process(
+                    render_farmer_report, fmt, forecasts, forecast_type, region, name, farmer_insights
+                )))
+
+        rendered = await asyncio.gather(*[job for _, _, job in jobs], return_exceptions=True)
+        for (entry, fmt, _), result in zip(jobs, rendered):
+            if isinstance(result, BaseException):
+                entry["error"] = f"{fmt} rendering failed: {result or type(result).__name__}"
+                continue
+            filename = f"{entry['farmerId']}.{fmt}"
+            _write_atomic(os.path.join(directory, filename), result)
+            entry["files"][fmt] = filename
+
+        manifest = {
+            "batchId": batch_id,
+            "createdAt": datetime.utcnow().isoformat() + "Z",
+            "forecastType": forecast_type,
+            "formats": formats,
+            "forecastRuns": len(shared),
+            "forecastSeconds": round(forecast_seconds, 3),
+            "totalSeconds": round(time.perf_counter() - started, 3),
+            "farmers": len(entries),
+            "failed": sum(1 for entry in entries if entry.get("error")),
+            "reports": entries,
+        }
+        _write_atomic(os.path.join(directory, "manifest.json"), json.dumps(manifest).encode("utf-8"))
+        self.prune()
+        return manifest
+
+    def load_manifest(self, batch_id: str) -> Optional[Dict]:
+        path = os.path.join(batch_dir(batch_id), "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def report_path(self, batch_id: str, farmer_id: str, fmt: str) -> Optional[str]:
+        manifest = self.load_manifest(batch_id)
+        if manifest is None:
+            return None
+        for entry in manifest["reports"]:
+            if entry["farmerId"] == farmer_id and fmt in entry["files"]:
+                return os.path.join(batch_dir(batch_id), entry["files"][fmt])
+        return None
+
+    def prune(self) -> None:
+        """Remove batches older than the retention window"""
+        if not os.path.isdir(REPORTS_DIR):
+            return
+        cutoff = time.time() - REPORT_BATCH_RETENTION_DAYS * 86400
+        for name in os.listdir(REPORTS_DIR):
+            path = os.path.join(REPORTS_DIR, name)
+            if _BATCH_ID.match(name) and os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                for filename in os.listdir(path):
+                    os.remove(os.path.join(path, filename))
+                os.rmdir(path)
+
+
+report_batch = ReportBatchGenerator()
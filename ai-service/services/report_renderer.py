@@ -0,0 +1,126 @@
+import io
+import csv
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def render_forecast_csv(forecasts: List[Dict], forecast_type: str, region: Optional[Dict] = None) -> bytes:
+    """Render forecasts as CSV bytes"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    # Write header
+    writer.writerow([
+        'Crop/Product',
+        'Demand Score',
+        'Price Recommendation (KES)',
+        'Confidence (%)',
+        'Region',
+        'Forecast Date',
+        'Forecast Type'
+    ])
+
+    # Write data
+    for forecast in forecasts:
+        writer.writerow([
+            forecast.get('crop', forecast.get('product', 'N/A')),
+            forecast.get('demand', 0),
+            forecast.get('priceRecommendation', forecast.get('price_recommendation', 0)),
+            forecast.get('confidence', 0),
+            region.get('county', 'Nationwide') if region else 'Nationwide',
+            datetime.now().strftime('%Y-%m-%d'),
+            forecast_type
+        ])
+
+    return output.getvalue().encode("utf-8")
+
+
+def render_forecast_pdf(
+    forecasts: List[Dict],
+    forecast_type: str,
+    scope: str,
+    region: Optional[Dict] = None,
+    title: str = "AgroMarketHub Demand Forecast Report",
+    summary: Optional[List[List[str]]] = None,
+) -> bytes:
+    """Render forecasts as a PDF report (requires reportlab)"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER
+
+    # Create PDF in memory
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+
+    # Title
+    elements.append(Paragraph(title, title_style))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Report metadata
+    metadata = [
+        ['Report Date:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+        ['Forecast Type:', forecast_type.capitalize()],
+        ['Scope:', scope.capitalize()],
+        ['Region:', region.get('county', 'Nationwide') if region else 'Nationwide'],
+    ] + (summary or [])
+
+    metadata_table = Table(metadata, colWidths=[2*inch, 4*inch])
+    metadata_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(metadata_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Forecast data table
+    if forecasts:
+        data = [['Crop/Product', 'Demand Score', 'Price (KES)', 'Confidence (%)']]
+
+        for forecast in forecasts:
+            data.append([
+                forecast.get('crop', forecast.get('product', 'N/A')),
+                f"{forecast.get('demand', 0)}%",
+                f"{forecast.get('priceRecommendation', forecast.get('price_recommendation', 0)):,.2f}",
+                f"{forecast.get('confidence', 0)}%"
+            ])
+
+        table = Table(data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f3f4f6')])
+        ]))
+        elements.append(table)
+    else:
+        elements.append(Paragraph("No forecast data available", styles['Normal']))
+
+    # Build PDF
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from services.demand_counters import demand_counters, daily_forecasts, NATIONWIDE
+from utils.redis_client import get_redis_client
+
+# Demand score at which a crop is considered in a spike (matches the
+# backend's historical "demand > 80" alert rule)
+SPIKE_DEMAND_THRESHOLD = float(os.getenv("SPIKE_DEMAND_THRESHOLD", 80))
+# Relative increase over the previous snapshot that also counts as a spike
+SPIKE_RELATIVE_CHANGE = float(os.getenv("SPIKE_RELATIVE_CHANGE", 0.25))
+# A spike stays active until demand falls this far below the threshold
+SPIKE_HYSTERESIS = float(os.getenv("SPIKE_HYSTERESIS", 5))
+SPIKE_RETENTION_DAYS = int(os.getenv("SPIKE_RETENTION_DAYS", 30))
+# Seconds between scheduled evaluations (0 disables)
+SPIKE_EVAL_INTERVAL = float(os.getenv("SPIKE_EVAL_INTERVAL", 3600))
+# Nationwide forecast types re-forecast on that schedule, so their spike state
+# stays current without request traffic (the backend's daily alert reads monthly)
+SPIKE_SCHEDULED_FORECASTS = [
+    forecast_type.strip()
+    for forecast_type in os.getenv("SPIKE_SCHEDULED_FORECASTS", "monthly").split(",")
+    if forecast_type.strip()
+]
+
+STATE_KEY = "spike:state"
+EVENTS_KEY = "spike:events"
+
+
+class SpikeDetector:
+    """Incremental demand spike detection per forecast type, mode, crop and region.
+
+    Each forecast snapshot is compared with the previous one for the same
+    (forecast type, mode, crop, region): crossing the demand threshold or
+    rising by the relative-change ratio records a spike event, and the state
+    keeps whether the crop is above the threshold right now. The mode
+    (aggregate, per_crop or realtime) is part of the key because each produces
+    its own demand scale, so alternating between them is not a change in
+    demand. State and events live in Redis so every replica sees the same spikes.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def observe(self, forecasts: List[Dict], forecast_type: str, mode: str = "aggregate") -> List[Dict]:
+        """Compare a forecast snapshot with the stored state and record new spikes"""
+        if not forecasts:
+            return []
+        try:
+            return await self._observe(forecasts, forecast_type, mode)
+        except Exception as e:
+            print(f"Error updating spike state: {e}")
+            return []
+
+    async def _observe(self, forecasts: List[Dict], forecast_type: str, mode: str) -> List[Dict]:
+        redis_client = await get_redis_client()
+        fields = [f"{forecast_type}|{mode}|{f['crop']}|{f.get('region') or 'Nationwide'}" for f in forecasts]
+        previous_states = await redis_client.hmget(STATE_KEY, fields)
+
+        now = time.time()
+        new_states = {}
+        events = []
+        for field, forecast, raw_previous in zip(fields, forecasts, previous_states):
+            previous = json.loads(raw_previous) if raw_previous else None
+            demand = float(forecast.get("demand", 0))
+            was_active = bool(previous and previous.get("active"))
+            previous_demand = previous.get("demand") if previous else None
+
+            crossed = demand >= SPIKE_DEMAND_THRESHOLD and not was_active
+            jumped = bool(previous_demand) and (demand - previous_demand) / previous_demand >= SPIKE_RELATIVE_CHANGE
+            active = demand >= SPIKE_DEMAND_THRESHOLD or (was_active and demand > SPIKE_DEMAND_THRESHOLD - SPIKE_HYSTERESIS)
+
+            if crossed or jumped:
+                events.append({
+                    "id": uuid.uuid4().hex[:12],
+                    "forecastType": forecast_type,
+                    "mode": mode,
+                    "crop": forecast["crop"],
+                    "region": forecast.get("region") or "Nationwide",
+                    "demand": demand,
+                    "previousDemand": previous_demand,
+                    "change": round((demand - previous_demand) / previous_demand, 4) if previous_demand else None,
+                    "reason": "threshold" if crossed else "relative_change",
+                    "confidence": forecast.get("confidence"),
+                    "priceRecommendation": forecast.get("priceRecommendation"),
+                    "detectedAt": datetime.utcfromtimestamp(now).isoformat() + "Z",
+                })
+            new_states[field] = json.dumps({
+                "demand": demand,
+                "active": active,
+                "confidence": forecast.get("confidence"),
+                "priceRecommendation": forecast.get("priceRecommendation"),
+                "updatedAt": now,
+            })
+
+        pipe = redis_client.pipeline()
+        pipe.hset(STATE_KEY, mapping=new_states)
+        if events:
+            pipe.zadd(EVENTS_KEY, {json.dumps(event): now for event in events})
+        pipe.zremrangebyscore(EVENTS_KEY, "-inf", now - SPIKE_RETENTION_DAYS * 86400)
+        await pipe.execute()
+        return events
+
+    async def spikes_since(
+        self,
+        since: float,
+        forecast_type: Optional[str] = None,
+        crop: Optional[str] = None,
+        region: Optional[str] = None,
+        reason: Optional[str] = None,
+    ) -> List[Dict]:
+        """Spike events recorded after the given epoch time, oldest first"""
+        redis_client = await get_redis_client()
+        members = await redis_client.zrangebyscore(EVENTS_KEY, f"({since}", "+inf")
+        events = [json.loads(member) for member in members]
+        return [
+            event for event in events
+            if (forecast_type is None or event["forecastType"] == forecast_type)
+            and (crop is None or event["crop"] == crop)
+            and (region is None or event["region"] == region)
+            and (reason is None or event["reason"] == reason)
+        ]
+
+    async def active_spikes(
+        self,
+        forecast_type: Optional[str] = None,
+        region: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> List[Dict]:
+        """Crops currently above the threshold, optionally only those observed in the last max_age seconds"""
+        redis_client = await get_redis_client()
+        states = await redis_client.hgetall(STATE_KEY)
+        oldest = time.time() - max_age if max_age is not None else None
+        active = []
+        for field, raw in states.items():
+            parts = field.split("|", 3)
+            if len(parts) != 4:
+                # State recorded before the mode was part of the key
+                continue
+            state_type, mode, crop, state_region = parts
+            state = json.loads(raw)
+            if (
+                state["active"]
+                and (forecast_type is None or state_type == forecast_type)
+                and (region is None or state_region == region)
+                and (oldest is None or state["updatedAt"] >= oldest)
+            ):
+                active.append({
+                    "forecastType": state_type,
+                    "mode": mode,
+                    "crop": crop,
+                    "region": state_region,
+                    "demand": state["demand"],
+                    "confidence": state.get("confidence"),
+                    "priceRecommendation": state.get("priceRecommendation"),
+                    "updatedAt": datetime.utcfromtimestamp(state["updatedAt"]).isoformat() + "Z",
+                })
+        return active
+
+    async def evaluate_realtime(self) -> List[Dict]:
+        """Observe daily demand for every county (and nationwide) from the real-time counters"""
+        current = await demand_counters.get_window_by_region()
+        previous = await demand_counters.get_window_by_region(hours_ago=24)
+        events = []
+        for region, totals in current.items():
+            label = "Nationwide" if region == NATIONWIDE else region
+            forecasts = daily_forecasts(totals, previous.get(region, {}), label, limit=len(totals))
+            events.extend(await self.observe(forecasts, "daily", mode="realtime"))
+        return events
+
+    async def evaluate_scheduled_forecasts(self) -> None:
+        """Re-forecast the scheduled nationwide types; generating a forecast observes it"""
+        # Imported here: the forecast service itself reports to this detector
+        from services.forecast_service import ForecastService
+
+        forecast_service = ForecastService()
+        for forecast_type in SPIKE_SCHEDULED_FORECASTS:
+            await forecast_service.generate_demand_forecast(forecast_type=forecast_type, scope="nationwide")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(SPIKE_EVAL_INTERVAL)
+            try:
+                await self.evaluate_realtime()
+            except Exception as e:
+                print(f"Error evaluating real-time demand spikes: {e}")
+            try:
+                await self.evaluate_scheduled_forecasts()
+            except Exception as e:
+                print(f"Error evaluating scheduled forecast demand spikes: {e}")
+
+    def start(self):
+        if self._task is None and SPIKE_EVAL_INTERVAL > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+spike_detector = SpikeDetector()
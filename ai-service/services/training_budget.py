@@ -0,0 +1,107 @@
+import math
+import os
+import time
+from typing import Dict
+
+import numpy as np
+
+# Upper bound on epochs; early stopping usually ends training well before it
+LSTM_MAX_EPOCHS = int(os.getenv("LSTM_MAX_EPOCHS", 40))
+# Wall-clock cap (seconds) for one LSTM fit, checked after every batch
+LSTM_FIT_TIME_BUDGET = float(os.getenv("LSTM_FIT_TIME_BUDGET", 20))
+LSTM_VALIDATION_SPLIT = float(os.getenv("LSTM_VALIDATION_SPLIT", 0.2))
+LSTM_EARLY_STOPPING_PATIENCE = int(os.getenv("LSTM_EARLY_STOPPING_PATIENCE", 5))
+LSTM_MIN_BATCH_SIZE = int(os.getenv("LSTM_MIN_BATCH_SIZE", 8))
+LSTM_MAX_BATCH_SIZE = int(os.getenv("LSTM_MAX_BATCH_SIZE", 64))
+# Adaptive batch sizing aims for about this many optimizer steps per epoch,
+# so per-epoch cost stays roughly constant as the history grows
+LSTM_TARGET_STEPS_PER_EPOCH = int(os.getenv("LSTM_TARGET_STEPS_PER_EPOCH", 16))
+
+# Below this many samples a validation split leaves too little to train on
+MIN_SAMPLES_FOR_VALIDATION = 40
+
+
+def adaptive_batch_size(n_samples: int) -> int:
+    """Power-of-two batch size giving ~LSTM_TARGET_STEPS_PER_EPOCH steps per epoch"""
+    target = max(1, n_samples // max(1, LSTM_TARGET_STEPS_PER_EPOCH))
+    size = 2 ** int(math.floor(math.log2(target))) if target > 1 else 1
+    return int(min(LSTM_MAX_BATCH_SIZE, max(LSTM_MIN_BATCH_SIZE, size)))
+
+
+class TrainingBudget:
+    """Bounds one Keras fit by epochs, wall-clock time and convergence.
+
+    Training stops at the first of: LSTM_MAX_EPOCHS epochs, no validation
+    improvement for LSTM_EARLY_STOPPING_PATIENCE epochs (best weights are
+    restored), or LSTM_FIT_TIME_BUDGET seconds. fit() returns the metadata of
+    the run so callers can record epochs used and time spent.
+    """
+
+    def __init__(
+        self,
+        max_epochs: int = LSTM_MAX_EPOCHS,
+        time_budget: float = LSTM_FIT_TIME_BUDGET,
+        validation_split: float = LSTM_VALIDATION_SPLIT,
+        patience: int = LSTM_EARLY_STOPPING_PATIENCE,
+    ):
+        self.max_epochs = max_epochs
+        self.time_budget = time_budget
+        self.validation_split = validation_split
+        self.patience = patience
+
+    def fit(self, model, X: np.ndarray, y: np.ndarray) -> Dict:
+        from tensorflow.keras import callbacks
+
+        batch_size = adaptive_batch_size(len(X))
+        validation_split = self.validation_split if len(X) >= MIN_SAMPLES_FOR_VALIDATION else 0.0
+        monitor = "val_loss" if validation_split else "loss"
+
+        started = time.perf_counter()
+        deadline = started + self.time_budget
+        timed_out = {"value": False}
+
+        def check_deadline(batch, logs=None):
+            if time.perf_counter() >= deadline:
+                timed_out["value"] = True
+                model.stop_training = True
+
+        early_stopping = callbacks.EarlyStopping(
+            monitor=monitor,
+            patience=self.patience,
+            restore_best_weights=True,
+        )
+        history = model.fit(
+            X,
+            y,
+            epochs=self.max_epochs,
+            batch_size=batch_size,
+            validation_split=validation_split,
+            # validation_split takes the last samples before shuffling, so the
+            # model is validated on the most recent part of the series
+            shuffle=True,
+            callbacks=[early_stopping, callbacks.LambdaCallback(on_batch_end=check_deadline)],
+            verbose=0,
+        )
+
+        epochs_run = len(history.history.get("loss", []))
+        if timed_out["value"]:
+            stop_reason = "time_budget"
+        elif epochs_run < self.max_epochs:
+            stop_reason = "early_stopping"
+        else:
+            stop_reason = "max_epochs"
+
+        monitored = history.history.get(monitor) or []
+        return {
+            "epochs": epochs_run,
+            "max_epochs": self.max_epochs,
+            "seconds": round(time.perf_counter() - started, 4),
+            "time_budget": self.time_budget,
+            "batch_size": batch_size,
+            "samples": int(len(X)),
+            "validation_split": validation_split,
+            "stop_reason": stop_reason,
+            "monitor": monitor,
+            "best_loss": float(min(monitored)) if monitored else None,
+            "fitted_at": time.time(),
+        }
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from services.lstm_inference import PARITY_TOLERANCE, NumpyLSTM, check_parity
+
+
+def _random_model(units: int = 8, seed: int = 0) -> NumpyLSTM:
+    rng = np.random.default_rng(seed)
+    return NumpyLSTM(
+        kernel=rng.normal(0, 0.3, (1, 4 * units)),
+        recurrent_kernel=rng.normal(0, 0.3, (units, 4 * units)),
+        bias=rng.normal(0, 0.1, 4 * units),
+        dense=[
+            {"kernel": rng.normal(0, 0.3, (units, 4)), "bias": np.zeros(4), "activation": "relu"},
+            {"kernel": rng.normal(0, 0.3, (4, 1)), "bias": np.zeros(1), "activation": "linear"},
+        ],
+    )
+
+
+def test_array_round_trip_keeps_forecast():
+    model = _random_model()
+    restored = NumpyLSTM.from_arrays(model.to_arrays())
+    sequence = np.linspace(0.2, 0.8, 14)
+
+    assert restored.forecast(sequence, 10) == model.forecast(sequence, 10)
+
+
+def test_forecast_feeds_predictions_back():
+    model = _random_model()
+    sequence = np.linspace(0.2, 0.8, 14)
+
+    forecast = model.forecast(sequence, 3)
+    first = model.predict(sequence.reshape(1, 14, 1))[0][0]
+    second = model.predict(np.append(sequence[1:], first).reshape(1, 14, 1))[0][0]
+
+    assert forecast[:2] == pytest.approx([first, second], abs=1e-6)
+
+
+def test_matches_keras_model():
+    pytest.importorskip("tensorflow")
+
+    result = check_parity(horizon=30, repeats=1, seed=7)
+
+    assert result["batch_max_abs_diff"] <= PARITY_TOLERANCE
+    assert result["forecast_max_abs_diff"] <= PARITY_TOLERANCE * result["horizon"]
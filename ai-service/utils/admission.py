@@ -0,0 +1,143 @@
+import asyncio
+import os
+import re
+from typing import Dict
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 10))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 5))
+
+
+def _limit(name: str, default: int) -> int:
+    return int(os.getenv(f"ADMISSION_{name}", default))
+
+
+# Route classes: name -> (max concurrent requests, max queued requests).
+# "light" has its own slots so health checks and audit logs are never
+# starved by expensive requests.
+ROUTE_CLASSES = {
+    "heavy": (_limit("HEAVY_CONCURRENCY", 2), _limit("HEAVY_QUEUE", 4)),
+    "forecast": (_limit("FORECAST_CONCURRENCY", 8), _limit("FORECAST_QUEUE", 16)),
+    "light": (_limit("LIGHT_CONCURRENCY", 32), _limit("LIGHT_QUEUE", 64)),
+}
+
+HEAVY_PATHS = [
+    re.compile(r"^/api/v1/forecasts/yield-vs-demand"),
+    re.compile(r"^/api/v1/reports/"),
+    re.compile(r"^/api/v1/admin/backtest"),
+]
+FORECAST_PATHS = [
+    re.compile(r"^/api/v1/forecasts/"),
+]
+
+
+# Lookups under the forecast prefix that never run a model
+LIGHT_PATHS = [
+    re.compile(r"^/api/v1/forecasts/spikes"),
+]
+
+
+def classify(path: str, query_string: bytes = b"") -> str:
+    """Map a request to its route class"""
+    if any(pattern.match(path) for pattern in LIGHT_PATHS):
+        return "light"
+    if any(pattern.match(path) for pattern in HEAVY_PATHS):
+        return "heavy"
+    if any(pattern.match(path) for pattern in FORECAST_PATHS):
+        query = parse_qs(query_string.decode("latin-1"))
+        # Long horizons and per-crop fits cost as much as the heavy endpoints
+        if "seasonal" in query.get("forecast_type", []) or "per_crop" in query.get("mode", []):
+            return "heavy"
+        return "forecast"
+    return "light"
+
+
+class RouteClassLimiter:
+    """Concurrency limit with a bounded wait queue for one route class"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    async def acquire(self, timeout: float = ADMISSION_QUEUE_TIMEOUT) -> bool:
+        if self._semaphore.locked() or self.waiting:
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+limiters: Dict[str, RouteClassLimiter] = {
+    name: RouteClassLimiter(name, concurrency, queue)
+    for name, (concurrency, queue) in ROUTE_CLASSES.items()
+}
+
+
+def get_admission_stats() -> Dict:
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware that sheds over-capacity requests with 503 + Retry-After.
+
+    The slot is held until the response body has been fully sent, so streamed
+    report downloads count against their class for their whole duration.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_CONTROL_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[classify(scope["path"], scope.get("query_string", b""))]
+        if not await limiter.acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": f"Service is at capacity for {limiter.name} requests, retry later"},
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,21 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against ADMIN_API_KEY; always False when no key is configured"""
+    admin_key = os.getenv("ADMIN_API_KEY")
+    if not admin_key or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), admin_key.encode("utf-8"))
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """FastAPI dependency for admin-only diagnostics endpoints"""
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -1,5 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from bson import ObjectId
 import os
+import sys
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
@@ -7,6 +17,157 @@ load_dotenv()
 
 client: AsyncIOMotorClient = None
 database = None
+analytics_database = None
+
+# Connection pool sizing (per process)
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", 50))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", 0))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 300000))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 10000))
+
+# Analytics reads (DataCollector aggregations, exports) go to secondaries so
+# they don't compete with the backend's transactional writes on the primary
+MONGODB_ANALYTICS_READ_PREFERENCE = os.getenv("MONGODB_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+# Maximum replication lag (seconds, >= 90) tolerated for analytics reads; -1 disables
+MONGODB_ANALYTICS_MAX_STALENESS = int(os.getenv("MONGODB_ANALYTICS_MAX_STALENESS", -1))
+ANALYTICS_MAX_TIME_MS = int(os.getenv("ANALYTICS_MAX_TIME_MS", 60000))
+ANALYTICS_ALLOW_DISK_USE = os.getenv("ANALYTICS_ALLOW_DISK_USE", "true").lower() == "true"
+
+MONGODB_SLOW_QUERY_MS = float(os.getenv("MONGODB_SLOW_QUERY_MS", 500))
+MONGODB_SLOW_QUERY_BUFFER = int(os.getenv("MONGODB_SLOW_QUERY_BUFFER", 100))
+
+# Compound indexes backing the DataCollector / ForecastService hot queries.
+# The backend Mongoose schemas only define single-field indexes, so the AI
+# service bootstraps the ones its own aggregations need.
+ANALYTICS_INDEXES = {
+    "orders": [
+        {
+            "keys": [("payment.status", ASCENDING), ("createdAt", DESCENDING)],
+            "name": "ai_payment_status_createdAt",
+        },
+        {
+            "keys": [("payment.status", ASCENDING), ("updatedAt", ASCENDING), ("_id", ASCENDING)],
+            "name": "ai_payment_status_updatedAt_id",
+        },
+        {
+            "keys": [("items.product", ASCENDING)],
+            "name": "ai_items_product",
+        },
+    ],
+    "products": [
+        {
+            "keys": [("updatedAt", DESCENDING)],
+            "name": "ai_updatedAt",
+        },
+    ],
+}
+
+
+MONITORED_COMMANDS = {"aggregate", "find", "count", "distinct", "getMore"}
+
+
+def _filter_shape(filter_doc) -> str:
+    """Field names of a filter, without values"""
+    if not isinstance(filter_doc, dict):
+        return ""
+    return "{" + ",".join(sorted(filter_doc.keys())) + "}"
+
+
+def command_shape(command_name: str, command: Dict) -> str:
+    """Value-free shape of a query, e.g. orders.aggregate $match{createdAt,payment.status} > $unwind"""
+    collection = command.get(command_name, "")
+    if command_name == "aggregate":
+        stages = []
+        for stage in command.get("pipeline", []):
+            name = next(iter(stage), "")
+            if name == "$match":
+                stages.append(name + _filter_shape(stage[name]))
+            elif name == "$lookup":
+                stages.append(f"$lookup({stage[name].get('from', '')})")
+            else:
+                stages.append(name)
+        return f"{collection}.aggregate {' > '.join(stages)}"
+    if command_name in ("find", "count", "distinct"):
+        return f"{collection}.{command_name} {_filter_shape(command.get('filter', command.get('query')))}"
+    return f"{command.get('collection', '')}.{command_name}"
+
+
+class SlowQueryMonitor(monitoring.CommandListener):
+    """Counts and logs Mongo queries slower than MONGODB_SLOW_QUERY_MS, grouped by shape.
+
+    Registered on the client as a command listener, so it sees every query the
+    service issues (including the backend-facing ones) without wrapping call sites.
+    """
+
+    def __init__(self, threshold_ms: float = MONGODB_SLOW_QUERY_MS, buffer_size: int = MONGODB_SLOW_QUERY_BUFFER):
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+        self._pending: Dict = {}
+        self._by_shape: Dict[str, Dict] = {}
+        self._recent = deque(maxlen=buffer_size)
+        self.total = 0
+        self.slow = 0
+
+    def started(self, event):
+        if event.command_name not in MONITORED_COMMANDS:
+            return
+        shape = command_shape(event.command_name, event.command)
+        read_preference = (event.command.get("$readPreference") or {}).get("mode", "primary")
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (shape, read_preference)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+            if pending is None:
+                return
+            shape, read_preference = pending
+            duration_ms = event.duration_micros / 1000
+            self.total += 1
+            if duration_ms < self.threshold_ms and not failed:
+                return
+            self.slow += 1
+            stats = self._by_shape.setdefault(shape, {"count": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["failed"] += int(failed)
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            self._recent.append({
+                "shape": shape,
+                "duration_ms": round(duration_ms, 2),
+                "failed": failed,
+                "read_preference": read_preference,
+                "at": time.time(),
+            })
+        status = "failed" if failed else "slow"
+        print(f"Mongo {status} query ({duration_ms:.0f} ms, {read_preference}): {shape}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold_ms,
+                "total_queries": self.total,
+                "slow_queries": self.slow,
+                "by_shape": sorted(
+                    (
+                        {"shape": shape, **stats, "avg_ms": round(stats["total_ms"] / stats["count"], 2)}
+                        for shape, stats in self._by_shape.items()
+                    ),
+                    key=lambda entry: entry["total_ms"],
+                    reverse=True,
+                ),
+                "recent": list(self._recent),
+            }
+
+
+slow_query_monitor = SlowQueryMonitor()
+
 
 def get_database_name_from_uri(uri: str) -> str:
     """Extract database name from MongoDB URI"""
@@ -26,8 +187,12 @@ def get_database_name_from_uri(uri: str) -> str:
         # Fallback to environment variable or default
         return os.getenv("MONGODB_DB_NAME", "agromarkethub")
 
+def _analytics_read_preference():
+    mode = read_pref_mode_from_name(MONGODB_ANALYTICS_READ_PREFERENCE)
+    return make_read_preference(mode, tag_sets=None, max_staleness=MONGODB_ANALYTICS_MAX_STALENESS)
+
 async def connect_db():
-    global client, database
+    global client, database, analytics_database
     mongodb_uri = os.getenv("MONGODB_URI")
     if not mongodb_uri:
         raise ValueError("MONGODB_URI not found in environment variables")
@@ -35,9 +200,17 @@ async def connect_db():
     # Extract database name from URI or use environment variable
     db_name = get_database_name_from_uri(mongodb_uri)
     
-    client = AsyncIOMotorClient(mongodb_uri)
+    client = AsyncIOMotorClient(
+        mongodb_uri,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[slow_query_monitor],
+    )
     database = client[db_name]
-    print(f"Connected to MongoDB database: {db_name}")
+    analytics_database = database.with_options(read_preference=_analytics_read_preference())
+    print(f"Connected to MongoDB database: {db_name} (analytics reads: {MONGODB_ANALYTICS_READ_PREFERENCE})")
 
 async def close_db():
     global client
@@ -48,3 +221,118 @@ async def close_db():
 def get_database():
     return database
 
+def get_analytics_database():
+    """Database handle for heavy analytics reads, routed by MONGODB_ANALYTICS_READ_PREFERENCE"""
+    return analytics_database if analytics_database is not None else database
+
+def analytics_options(max_time_ms: Optional[int] = None, allow_disk_use: Optional[bool] = None) -> Dict:
+    """Per-query aggregate options: server-side time limit and spilling large stages to disk"""
+    return {
+        "maxTimeMS": max_time_ms if max_time_ms is not None else ANALYTICS_MAX_TIME_MS,
+        "allowDiskUse": allow_disk_use if allow_disk_use is not None else ANALYTICS_ALLOW_DISK_USE,
+    }
+
+def get_query_stats() -> Dict:
+    return slow_query_monitor.stats()
+
+async def ensure_indexes(db=None) -> Dict[str, List[str]]:
+    """Create the compound indexes used by the AI service analytics queries"""
+    db = db if db is not None else get_database()
+    if db is None:
+        raise ValueError("Database connection is not initialized")
+
+    created: Dict[str, List[str]] = {}
+    for collection_name, specs in ANALYTICS_INDEXES.items():
+        collection = db[collection_name]
+        created[collection_name] = []
+        for spec in specs:
+            # create_index is a no-op when an identical index already exists
+            name = await collection.create_index(spec["keys"], name=spec["name"], background=True)
+            created[collection_name].append(name)
+    print(f"Ensured AI service indexes: {created}")
+    return created
+
+def _hot_queries() -> List[Dict]:
+    """Representative shapes of the DataCollector / ForecastService queries"""
+    cutoff_date = datetime.now() - timedelta(days=180)
+    return [
+        {
+            "name": "get_sales_data / get_regional_sales",
+            "collection": "orders",
+            "filter": {"payment.status": "completed", "createdAt": {"$gte": cutoff_date}},
+        },
+        {
+            "name": "demand counter polling",
+            "collection": "orders",
+            "filter": {"payment.status": "completed", "updatedAt": {"$gt": cutoff_date}},
+        },
+        {
+            "name": "get_farmer_insights orders",
+            "collection": "orders",
+            "filter": {"items.product": {"$in": [ObjectId()]}},
+        },
+        {
+            "name": "get_price_history / get_buyer_behavior_data",
+            "collection": "products",
+            "filter": {"updatedAt": {"$gte": cutoff_date}},
+        },
+    ]
+
+def _collect_stages(plan: Dict) -> List[str]:
+    """Flatten the stage names of a winning plan tree"""
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_collect_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_collect_stages(child))
+    return stages
+
+async def check_query_plans(db=None) -> List[Dict]:
+    """Explain each hot query and raise if any falls back to a collection scan"""
+    db = db if db is not None else get_database()
+    if db is None:
+        raise ValueError("Database connection is not initialized")
+
+    results = []
+    for query in _hot_queries():
+        explain = await db.command(
+            "explain",
+            {"find": query["collection"], "filter": query["filter"]},
+            verbosity="queryPlanner",
+        )
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _collect_stages(winning_plan)
+        results.append({
+            "name": query["name"],
+            "collection": query["collection"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+
+    scans = [r for r in results if r["collscan"]]
+    if scans:
+        names = ", ".join(f"{r['name']} ({r['collection']})" for r in scans)
+        raise RuntimeError(f"Hot queries fell back to COLLSCAN: {names}. Run ensure_indexes first.")
+    return results
+
+async def _main(argv: List[str]) -> int:
+    await connect_db()
+    try:
+        if "--ensure-indexes" in argv or not argv:
+            await ensure_indexes()
+        if "--check-plans" in argv:
+            for result in await check_query_plans():
+                print(f"{result['name']}: {' -> '.join(result['stages'])}")
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+    finally:
+        await close_db()
+    return 0
+
+if __name__ == "__main__":
+    # Usage: python -m utils.database [--ensure-indexes] [--check-plans]
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
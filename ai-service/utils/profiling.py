@@ -0,0 +1,189 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+
+from utils.auth import is_admin_token
+
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", 20))
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "__profile"
+
+# Most recent profiles, oldest evicted first
+profiles: Deque[Dict] = deque(maxlen=PROFILE_BUFFER_SIZE)
+# Sampler of the request being profiled; pool jobs started from it are
+# sampled inside their worker and merged back (see utils.worker_pool)
+active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class StackSampler:
+    """Samples thread stacks at a fixed interval from a background thread.
+
+    The event-loop thread shows Python-level work (pandas, Keras, Stan calls);
+    the other threads show blocking I/O such as Motor's executor threads. Other
+    requests running at the same time will also appear in the samples. Model
+    fits run in pool workers appear under a `pool-worker-<pid>` root.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.counts[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def merge(self, counts: Dict, root: str) -> None:
+        """Add stacks sampled in another process (e.g. a pool worker) under a root frame"""
+        for stack, count in counts.items():
+            self.counts[(root,) + tuple(stack)] += count
+
+    def folded(self) -> str:
+        """Collapsed stacks ("a;b;c count"), the input format of flamegraph.pl and speedscope"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.counts.most_common())
+
+    def call_tree(self, min_samples: int = 1) -> Dict:
+        root = {"name": "root", "samples": 0, "children": {}}
+        for stack, count in self.counts.items():
+            root["samples"] += count
+            node = root
+            for label in stack:
+                child = node["children"].setdefault(label, {"name": label, "samples": 0, "children": {}})
+                child["samples"] += count
+                node = child
+
+        def prune(node: Dict) -> Dict:
+            children = sorted(
+                (prune(child) for child in node["children"].values() if child["samples"] >= min_samples),
+                key=lambda child: child["samples"],
+                reverse=True,
+            )
+            return {"name": node["name"], "samples": node["samples"], "children": children}
+
+        return prune(root)
+
+
+def _profile_mode(scope) -> Optional[str]:
+    """'store', 'return' or None, from the X-Profile header or __profile query flag"""
+    headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+    value = headers.get(PROFILE_HEADER)
+    if value is None:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        value = (query.get(PROFILE_QUERY_PARAM) or [None])[0]
+    if not value or value.lower() in ("0", "false"):
+        return None
+    if not is_admin_token(headers.get("x-admin-token")):
+        return None
+    return "return" if value.lower() == "return" else "store"
+
+
+def get_profile(profile_id: str) -> Optional[Dict]:
+    for profile in profiles:
+        if profile["id"] == profile_id:
+            return profile
+    return None
+
+
+def list_profiles() -> List[Dict]:
+    return [
+        {key: profile[key] for key in ("id", "method", "path", "status", "startedAt", "durationMs", "samples")}
+        for profile in reversed(profiles)
+    ]
+
+
+class ProfilingMiddleware:
+    """Runs admin-flagged requests under the stack sampler and keeps the result in a ring buffer.
+
+    `X-Profile: 1` (or `?__profile=1`) stores the profile and returns its id in
+    `X-Profile-Id`; `X-Profile: return` replaces the response with the profile.
+    Both require a valid `X-Admin-Token`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = _profile_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status: List[int] = [0]
+        started_at = datetime.now()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if mode == "return":
+                    return
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            elif mode == "return":
+                return
+            await send(message)
+
+        sampler = StackSampler()
+        start = time.perf_counter()
+        sampler.start()
+        token = active_sampler.set(sampler)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            active_sampler.reset(token)
+            sampler.stop()
+            profile = {
+                "id": profile_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status[0],
+                "startedAt": started_at.isoformat(),
+                "durationMs": round((time.perf_counter() - start) * 1000, 2),
+                "samples": sampler.samples,
+                "intervalMs": sampler.interval * 1000,
+                "tree": sampler.call_tree(),
+                "folded": sampler.folded(),
+            }
+            profiles.append(profile)
+
+        if mode == "return":
+            await JSONResponse({"success": True, "data": profile})(scope, receive, send)
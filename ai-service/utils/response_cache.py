@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+
+from utils.redis_client import get_redis_client
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
+RESPONSE_CACHE_TTL = int(os.getenv("FORECAST_CACHE_TTL", 3600))
+# Daily forecasts come from real-time counters, so they are only cached briefly
+REALTIME_CACHE_TTL = int(os.getenv("REALTIME_CACHE_TTL", 60))
+# Most-recently-used responses kept in process memory in front of Redis
+RESPONSE_CACHE_LOCAL_ENTRIES = int(os.getenv("RESPONSE_CACHE_LOCAL_ENTRIES", 256))
+REDIS_PREFIX = "response:"
+# Bumped on every invalidation; replicas drop their local entries when it changes
+GENERATION_KEY = "response_cache:generation"
+# Seconds between generation checks, i.e. how long another replica's
+# invalidation can take to reach this one's local entries
+RESPONSE_CACHE_GENERATION_TTL = float(os.getenv("RESPONSE_CACHE_GENERATION_TTL", 1))
+
+# key -> (expires_at, body, etag), least recently used first
+_local_cache: "OrderedDict[str, Tuple[float, bytes, str]]" = OrderedDict()
+_local_generation: Optional[str] = None
+_generation_checked_at = 0.0
+# key -> the build running for a miss, shared by concurrent misses
+_builds: Dict[str, asyncio.Task] = {}
+
+
+def _default(value):
+    """Serialize types the JSON encoders don't handle natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def dumps(payload) -> bytes:
+    """Serialize a payload to JSON bytes, using orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" matches "x"
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _remember(key: str, expires_at: float, body: bytes, etag: str) -> None:
+    _local_cache[key] = (expires_at, body, etag)
+    _local_cache.move_to_end(key)
+    while len(_local_cache) > RESPONSE_CACHE_LOCAL_ENTRIES:
+        _local_cache.popitem(last=False)
+
+
+async def _sync_generation(redis_client) -> None:
+    """Drop local entries if another replica invalidated since they were stored"""
+    global _local_generation, _generation_checked_at
+    if time.monotonic() - _generation_checked_at < RESPONSE_CACHE_GENERATION_TTL:
+        return
+    generation = await redis_client.get(GENERATION_KEY)
+    _generation_checked_at = time.monotonic()
+    if generation != _local_generation:
+        _local_cache.clear()
+        _local_generation = generation
+
+
+async def get_cached(key: str) -> Optional[Tuple[bytes, str]]:
+    """Return (body, etag) for a key from the local cache or Redis"""
+    try:
+        redis_client = await get_redis_client()
+        await _sync_generation(redis_client)
+    except Exception as e:
+        # Without Redis the local entries are the only copy; serve them until they expire
+        print(f"Error reading response cache generation: {e}")
+        redis_client = None
+
+    entry = _local_cache.get(key)
+    if entry and entry[0] > time.time():
+        _local_cache.move_to_end(key)
+        return entry[1], entry[2]
+    _local_cache.pop(key, None)
+    if redis_client is None:
+        return None
+
+    try:
+        cached = await redis_client.get(REDIS_PREFIX + key)
+    except Exception as e:
+        print(f"Error reading response cache: {e}")
+        return None
+    if not cached:
+        return None
+
+    body = cached.encode("utf-8")
+    etag = make_etag(body)
+    try:
+        remaining = await redis_client.ttl(REDIS_PREFIX + key)
+    except Exception:
+        remaining = RESPONSE_CACHE_TTL
+    _remember(key, time.time() + max(remaining, 1), body, etag)
+    return body, etag
+
+
+async def store(key: str, payload, ttl: int = RESPONSE_CACHE_TTL) -> Tuple[bytes, str]:
+    """Pre-serialize a payload and store it with its content hash"""
+    body = dumps(payload)
+    etag = make_etag(body)
+    _remember(key, time.time() + ttl, body, etag)
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.set(REDIS_PREFIX + key, body.decode("utf-8"), ex=ttl)
+    except Exception as e:
+        print(f"Error writing response cache: {e}")
+    return body, etag
+
+
+async def invalidate(prefix: str = "") -> None:
+    """Drop cached responses whose key starts with prefix (all when empty), on every replica"""
+    for key in [k for k in _local_cache if k.startswith(prefix)]:
+        _local_cache.pop(key, None)
+    try:
+        redis_client = await get_redis_client()
+        async for redis_key in redis_client.scan_iter(match=f"{REDIS_PREFIX}{prefix}*"):
+            await redis_client.delete(redis_key)
+        # Other replicas see the new generation on their next check and clear
+        # their local layer (which then refills from Redis)
+        global _local_generation
+        _local_generation = str(await redis_client.incr(GENERATION_KEY))
+    except Exception as e:
+        print(f"Error invalidating response cache: {e}")
+
+
+async def _build_once(key: str, build: Callable[[], Awaitable[Dict]], ttl: int) -> Tuple[bytes, str]:
+    """Build and store a missed key once for all concurrent misses in this process"""
+    task = _builds.get(key)
+    if task is None:
+        async def build_and_store():
+            return await store(key, await build(), ttl)
+
+        task = asyncio.ensure_future(build_and_store())
+        _builds[key] = task
+
+        def done(finished: asyncio.Task):
+            _builds.pop(key, None)
+            # Mark the outcome retrieved even if every waiter has gone away
+            if not finished.cancelled():
+                finished.exception()
+
+        task.add_done_callback(done)
+    # A waiter that disconnects doesn't cancel the build for the others
+    return await asyncio.shield(task)
+
+
+async def cached_json_response(
+    request: Request,
+    key: str,
+    build: Callable[[], Awaitable[Dict]],
+    ttl: int = RESPONSE_CACHE_TTL,
+) -> Response:
+    """Serve pre-serialized JSON for key, answering If-None-Match with 304"""
+    cached = await get_cached(key)
+    if cached is None:
+        cached = await _build_once(key, build, ttl)
+    body, etag = cached
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,77 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict
+
+
+class StageStats:
+    """Per-pipeline, per-stage latency totals across runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pipelines: Dict[str, Dict] = {}
+
+    def record(self, pipeline: str, stages: Dict[str, float], total: float) -> None:
+        with self._lock:
+            entry = self._pipelines.setdefault(pipeline, {"runs": 0, "stages": {}})
+            entry["runs"] += 1
+            for name, seconds in list(stages.items()) + [("total", total)]:
+                stats = entry["stages"].setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+                stats["count"] += 1
+                stats["total_seconds"] += seconds
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+                stats["last_seconds"] = seconds
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                pipeline: {
+                    "runs": entry["runs"],
+                    "stages": {
+                        name: {
+                            **{key: round(value, 4) for key, value in stats.items()},
+                            "avg_seconds": round(stats["total_seconds"] / stats["count"], 4),
+                        }
+                        for name, stats in entry["stages"].items()
+                    },
+                }
+                for pipeline, entry in self._pipelines.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pipelines.clear()
+
+
+stage_stats = StageStats()
+
+
+class StageTimer:
+    """Times the named stages of one pipeline run.
+
+    Stages may overlap (independent stages are awaited concurrently), so the
+    total is the run's wall time rather than the sum of the stages.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # A stage run more than once (e.g. one fit per horizon) accumulates
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    async def run(self, name: str, awaitable: Awaitable) -> Any:
+        with self.stage(name):
+            return await awaitable
+
+    def finish(self) -> Dict[str, float]:
+        total = time.perf_counter() - self.started
+        stage_stats.record(self.pipeline, self.stages, total)
+        return {**{name: round(seconds, 4) for name, seconds in self.stages.items()}, "total": round(total, 4)}
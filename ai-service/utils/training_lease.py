@@ -0,0 +1,122 @@
+import asyncio
+import os
+from typing import Dict, Optional
+
+from utils.redis_client import get_redis_client
+from utils.worker_pool import FORECAST_MODEL_TIME_BUDGET
+
+TRAINING_LEASE_ENABLED = os.getenv("TRAINING_LEASE_ENABLED", "true").lower() == "true"
+# Lease expiry in seconds; the holder renews it every third of this while training
+TRAINING_LEASE_TTL = float(os.getenv("TRAINING_LEASE_TTL", 60))
+# How long a replica waits for another replica's result before serving the previous one
+TRAINING_LEASE_WAIT = float(os.getenv("TRAINING_LEASE_WAIT", 30))
+# With no previous result (cold start) it keeps waiting while the holder renews
+# its lease, for up to a full fit budget plus one lease expiry
+TRAINING_LEASE_COLD_WAIT = max(TRAINING_LEASE_WAIT, FORECAST_MODEL_TIME_BUDGET + TRAINING_LEASE_TTL)
+TRAINING_LEASE_POLL_INTERVAL = float(os.getenv("TRAINING_LEASE_POLL_INTERVAL", 0.25))
+
+LEASE_PREFIX = "train_lease:"
+FENCE_PREFIX = "train_fence:"
+
+# Take the lease if free and issue the next fencing token for the key
+_ACQUIRE = """
+if redis.call('set', KEYS[1], 'pending', 'NX', 'PX', ARGV[1]) then
+  local token = redis.call('incr', KEYS[2])
+  redis.call('set', KEYS[1], token, 'PX', ARGV[1])
+  return token
+end
+return 0
+"""
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# Write results only if no newer token has been issued since this one, so a
+# holder whose lease expired mid-fit cannot overwrite its successor's result
+_PUBLISH = """
+if tonumber(redis.call('get', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+  return 0
+end
+for i = 2, #KEYS do
+  redis.call('set', KEYS[i], ARGV[i + 1], 'EX', ARGV[2])
+end
+return 1
+"""
+
+
+class TrainingLease:
+    """Cross-replica lease for training one model key, with fencing tokens.
+
+    Only the replica holding the lease trains; every acquisition increments a
+    per-key fencing token and results are published only under the newest
+    token. The lease expires after TRAINING_LEASE_TTL unless the holder keeps
+    renewing it, so a crashed replica cannot block training for long.
+    """
+
+    def __init__(self, key: str, ttl: float = TRAINING_LEASE_TTL):
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.token: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def lease_key(self) -> str:
+        return f"{LEASE_PREFIX}{self.key}"
+
+    @property
+    def fence_key(self) -> str:
+        return f"{FENCE_PREFIX}{self.key}"
+
+    async def acquire(self) -> bool:
+        redis_client = await get_redis_client()
+        token = int(await redis_client.eval(_ACQUIRE, 2, self.lease_key, self.fence_key, self.ttl_ms))
+        if not token:
+            return False
+        self.token = token
+        self._heartbeat = asyncio.create_task(self._renew_loop())
+        return True
+
+    async def _renew_loop(self):
+        redis_client = await get_redis_client()
+        while True:
+            await asyncio.sleep(self.ttl_ms / 3000)
+            try:
+                renewed = await redis_client.eval(_RENEW, 1, self.lease_key, self.token, self.ttl_ms)
+            except Exception as e:
+                print(f"Error renewing training lease {self.key}: {e}")
+                continue
+            if not renewed:
+                # Expired before a renewal; publish() is fenced if another replica took over
+                print(f"Training lease {self.key} token {self.token} expired while training")
+                return
+
+    async def publish(self, values: Dict[str, str], ttl: int) -> bool:
+        """Set the given keys if this lease's token is still the newest; False if fenced off"""
+        redis_client = await get_redis_client()
+        keys = list(values)
+        published = await redis_client.eval(
+            _PUBLISH, 1 + len(keys), self.fence_key, *keys, self.token, ttl, *[values[key] for key in keys]
+        )
+        if not published:
+            print(f"Training lease {self.key} token {self.token} was superseded; result not published")
+        return bool(published)
+
+    async def release(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self.token is None:
+            return
+        try:
+            redis_client = await get_redis_client()
+            await redis_client.eval(_RELEASE, 1, self.lease_key, self.token)
+        except Exception as e:
+            print(f"Error releasing training lease {self.key}: {e}")
@@ -0,0 +1,305 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.profiling import StackSampler, active_sampler
+
+FORECAST_MAX_WORKERS = int(os.getenv("FORECAST_MAX_WORKERS", os.cpu_count() or 1))
+FORECAST_MODEL_TIME_BUDGET = float(os.getenv("FORECAST_MODEL_TIME_BUDGET", 120))
+
+# Shutdown message; jobs are never empty once pickled
+_STOP = b""
+
+# Module-level functions run in every worker: initializers once at start,
+# status hooks after each job (their dicts are merged into the worker's stats)
+_initializers: List[Callable[[], None]] = []
+_status_hooks: List[Callable[[], Dict]] = []
+
+
+def register_worker_hooks(
+    initializer: Optional[Callable[[], None]] = None,
+    status: Optional[Callable[[], Dict]] = None,
+) -> None:
+    """Register picklable hooks for workers spawned from now on"""
+    if initializer is not None and initializer not in _initializers:
+        _initializers.append(initializer)
+    if status is not None and status not in _status_hooks:
+        _status_hooks.append(status)
+
+
+def _worker_status(hooks: List[Callable[[], Dict]]) -> Dict:
+    status = {}
+    for hook in hooks:
+        try:
+            status.update(hook())
+        except Exception as e:
+            status.setdefault("errors", []).append(repr(e))
+    return status
+
+
+def _worker_main(conn, initializers: List[Callable[[], None]], status_hooks: List[Callable[[], Dict]]) -> None:
+    """Worker loop: load a pickled (func, args, profile), acknowledge the start, send back the outcome"""
+    for initializer in initializers:
+        initializer()
+    while True:
+        try:
+            message = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+        if message == _STOP:
+            return
+        try:
+            func, args, profile = pickle.loads(message)
+        except Exception as e:
+            conn.send(("error", RuntimeError(f"Could not load job: {e!r}"), None, None))
+            continue
+
+        conn.send(("started", None, None, None))
+        # A profiled request samples its jobs here, where the model code runs
+        sampler = StackSampler() if profile else None
+        if sampler is not None:
+            sampler.start()
+        try:
+            status, value = "ok", func(*args)
+        except Exception as e:
+            status, value = "error", e
+        finally:
+            if sampler is not None:
+                sampler.stop()
+        samples = dict(sampler.counts) if sampler is not None else None
+        try:
+            conn.send((status, value, _worker_status(status_hooks), samples))
+        except Exception as e:
+            # Unpicklable result or exception
+            conn.send(("error", RuntimeError(f"Could not return job outcome: {e!r}"), None, samples))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        # spawn rather than fork: forking a process that already loaded
+        # TensorFlow/Stan threads can deadlock the children
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, list(_initializers), list(_status_hooks)),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.started_at = time.time()
+        self.jobs = 0
+        self.retired = False
+        # As reported by the status hooks after the worker's last job
+        self.status: Dict = {}
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def stop(self, kill: bool = False) -> None:
+        if not kill and self.process.is_alive():
+            try:
+                self.conn.send_bytes(_STOP)
+                self.process.join(timeout=5)
+            except (OSError, ValueError):
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+
+class WorkerPool:
+    """Fixed-size set of spawned worker processes for CPU-bound jobs.
+
+    A job is sent only once a worker is free, and its time budget starts when
+    the worker acknowledges it, so time spent queued for a worker never counts
+    against the budget. A worker whose job overruns (or whose caller gives up)
+    is killed and replaced rather than left running the abandoned job.
+
+    Workers keep their own module state (e.g. the model cache); status hooks
+    report it back after every job and recycle() replaces the workers to free it.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._idle: List[_Worker] = []
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Blocking pipe reads/writes, at most one per busy worker
+        self._io = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="worker-pool-io")
+        self.completed = 0
+        self.timeouts = 0
+        self.replaced = 0
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        sampler = active_sampler.get()
+        payload = pickle.dumps((func, args, sampler is not None), protocol=pickle.HIGHEST_PROTOCOL)
+        worker = await self._checkout()
+        healthy = False
+        try:
+            status, value, worker_status, samples = await self._send(worker, payload)
+            if status == "started":
+                status, value, worker_status, samples = await self._receive(worker, timeout)
+            if worker_status is not None:
+                worker.status = worker_status
+            if samples and sampler is not None:
+                sampler.merge(samples, f"pool-worker-{worker.pid}")
+            healthy = True
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Worker process {worker.pid} exited while running {getattr(func, '__name__', func)}") from e
+        finally:
+            if healthy:
+                worker.jobs += 1
+                self.completed += 1
+                self._checkin(worker)
+            else:
+                self._discard(worker)
+
+        if status == "error":
+            raise value
+        return value
+
+    async def _send(self, worker: _Worker, payload: bytes) -> Tuple[str, Any]:
+        """Send a job and wait for the worker to acknowledge (or reject) it"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._io, worker.conn.send_bytes, payload)
+        return await loop.run_in_executor(self._io, worker.conn.recv)
+
+    async def _receive(self, worker: _Worker, timeout: Optional[float]) -> Tuple[str, Any]:
+        future = asyncio.get_running_loop().run_in_executor(self._io, worker.conn.recv)
+        if timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout=timeout)
+
+    async def _checkout(self) -> _Worker:
+        while True:
+            if self._idle:
+                return self._idle.pop()
+            if len(self._workers) < self.size:
+                worker = _Worker(self._context)
+                self._workers.append(worker)
+                return worker
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken just before being cancelled: pass the free worker on
+                    self._wake()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _checkin(self, worker: _Worker) -> None:
+        if worker.retired:
+            self._workers.remove(worker)
+            worker.stop()
+        elif worker.process.is_alive():
+            self._idle.append(worker)
+        else:
+            self._discard(worker)
+            return
+        self._wake()
+
+    def recycle(self) -> int:
+        """Replace every worker (busy ones once their job finishes), freeing their state"""
+        for worker in self._workers:
+            worker.retired = True
+        idle, self._idle = self._idle, []
+        for worker in idle:
+            self._workers.remove(worker)
+            worker.stop()
+        self._wake()
+        return len(idle)
+
+    def _discard(self, worker: _Worker) -> None:
+        """Kill a worker that overran or died; a fresh one is spawned on the next checkout"""
+        if worker in self._workers:
+            self._workers.remove(worker)
+            self.replaced += 1
+        worker.stop(kill=True)
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "workers": len(self._workers),
+            "idle": len(self._idle),
+            "queued": len(self._waiters),
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "replaced": self.replaced,
+            "processes": [
+                {
+                    "pid": worker.pid,
+                    "busy": worker not in self._idle,
+                    "jobs": worker.jobs,
+                    "started_at": worker.started_at,
+                    **worker.status,
+                }
+                for worker in self._workers
+            ],
+        }
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.stop(kill=worker not in self._idle)
+        self._workers.clear()
+        self._idle.clear()
+        self._io.shutdown(wait=False, cancel_futures=True)
+
+
+process_pool: WorkerPool = None
+
+
+def get_process_pool() -> WorkerPool:
+    """Return the shared worker pool used for CPU-bound model fits"""
+    global process_pool
+    if process_pool is None:
+        process_pool = WorkerPool(FORECAST_MAX_WORKERS)
+    return process_pool
+
+
+async def run_in_process(
+    func: Callable,
+    *args,
+    timeout: Optional[float] = FORECAST_MODEL_TIME_BUDGET,
+) -> Any:
+    """Run func(*args) in a pool worker, raising asyncio.TimeoutError once it has run past the budget"""
+    return await get_process_pool().run(func, *args, timeout=timeout)
+
+
+def get_process_pool_stats() -> Optional[Dict]:
+    """Pool and per-worker stats, or None before the first job started the pool"""
+    return process_pool.stats() if process_pool is not None else None
+
+
+def recycle_process_pool() -> None:
+    if process_pool is not None:
+        process_pool.recycle()
+
+
+def close_process_pool() -> None:
+    global process_pool
+    if process_pool is not None:
+        process_pool.close()
+        process_pool = None
@@ -155,18 +155,26 @@ class EmailService {
   }
 
   async sendAIDemandAlert(email: string, forecastData: any): Promise<void> {
+    const crops = forecastData.crops || [];
+    const rising = forecastData.rising || [];
     const html = `
-      <h2>High Demand Alert</h2>
+      <h2>${crops.length > 0 ? 'High Demand Alert' : 'Rising Demand Alert'}</h2>
+      ${crops.length > 0 ? `
       <p>We've detected high demand for the following crops:</p>
       <ul>
-        ${forecastData.crops.map((crop: any) => `<li>${crop.name} - ${crop.demand}% increase</li>`).join('')}
-      </ul>
+        ${crops.map((crop: any) => `<li>${crop.name} - demand score ${crop.demand}${crop.isNew ? ' (new today)' : ''}</li>`).join('')}
+      </ul>` : ''}
+      ${rising.length > 0 ? `
+      <p>Demand is rising for these crops:</p>
+      <ul>
+        ${rising.map((crop: any) => `<li>${crop.name} - demand score ${crop.demand}${crop.change != null ? ` (up ${Math.round(crop.change * 100)}%)` : ''}</li>`).join('')}
+      </ul>` : ''}
       <p>Consider listing these products to maximize your sales!</p>
     `;
 
     await this.sendEmail({
       to: email,
-      subject: 'High Demand Alert - AgroMarketHub',
+      subject: `${crops.length > 0 ? 'High' : 'Rising'} Demand Alert - AgroMarketHub`,
       html,
     });
   }
@@ -48,25 +48,58 @@ class SchedulerService {
         return;
       }
 
-      // Get AI forecasts from AI service
-      let forecasts: any[] = [];
+      // Crops currently above the demand threshold in the nationwide monthly
+      // forecast (the AI service re-evaluates it on its own schedule), plus the
+      // spike events of the last 24 hours for newly spiking and rising crops
+      let active: any[] = [];
+      let spikes: any[] = [];
       try {
-        const response = await axios.get(`${this.aiServiceUrl}/api/v1/forecasts/nationwide?forecast_type=monthly`);
-        if (response.data.success && response.data.data.forecasts) {
-          forecasts = response.data.data.forecasts;
+        const since = new Date(Date.now() - 24 * 60 * 60 * 1000).toISOString();
+        const [activeResponse, spikesResponse] = await Promise.all([
+          axios.get(`${this.aiServiceUrl}/api/v1/forecasts/spikes/active`, {
+            params: { forecast_type: 'monthly', region: 'Nationwide', max_age: 2 * 24 * 60 * 60 },
+          }),
+          axios.get(`${this.aiServiceUrl}/api/v1/forecasts/spikes`, {
+            params: { since, region: 'Nationwide' },
+          }),
+        ]);
+        if (activeResponse.data.success && activeResponse.data.data) {
+          active = activeResponse.data.data;
+        }
+        if (spikesResponse.data.success && spikesResponse.data.data.spikes) {
+          spikes = spikesResponse.data.data.spikes;
         }
       } catch (error: any) {
-        logger.error('Failed to fetch AI forecasts for demand alerts:', error.message);
+        logger.error('Failed to fetch AI demand spikes for demand alerts:', error.message);
         return;
       }
 
-      // Identify high-demand crops (demand > 80% or significant increase)
-      const highDemandCrops = forecasts.filter(
-        (forecast: any) => forecast.demand > 80 || (forecast.confidence && forecast.confidence > 90)
+      // One entry per crop, keeping its highest demand
+      const strongestByCrop = (entries: any[]) => {
+        const byCrop = new Map<string, any>();
+        for (const entry of entries) {
+          const existing = byCrop.get(entry.crop);
+          if (!existing || entry.demand > existing.demand) {
+            byCrop.set(entry.crop, entry);
+          }
+        }
+        return Array.from(byCrop.values());
+      };
+
+      // High demand is every crop still above the threshold (the old demand > 80
+      // rule), flagged as new if it crossed in the last 24 hours; a relative
+      // jump (e.g. 30 -> 38) is reported separately as rising demand
+      const highDemandCrops = strongestByCrop(active);
+      const highDemandNames = new Set(highDemandCrops.map((crop: any) => crop.crop));
+      const newlySpiking = new Set(
+        spikes.filter((spike: any) => spike.reason === 'threshold').map((spike: any) => spike.crop)
+      );
+      const risingCrops = strongestByCrop(
+        spikes.filter((spike: any) => spike.reason === 'relative_change' && !highDemandNames.has(spike.crop))
       );
 
-      if (highDemandCrops.length === 0) {
-        logger.info('No high-demand crops detected');
+      if (highDemandCrops.length === 0 && risingCrops.length === 0) {
+        logger.info('No high-demand or rising-demand crops detected');
         return;
       }
 
@@ -82,6 +115,12 @@ class SchedulerService {
               demand: crop.demand,
               confidence: crop.confidence,
               priceRecommendation: crop.priceRecommendation,
+              isNew: newlySpiking.has(crop.crop),
+            })),
+            rising: risingCrops.map((crop: any) => ({
+              name: crop.crop,
+              demand: crop.demand,
+              change: crop.change,
             })),
           });
           successCount++;